@@ -1,6 +1,6 @@
 import numpy as np
 
-from agents.game_utils import BoardPiece, PlayerAction, SavedState, NO_PLAYER, INDEX_HIGHEST_ROW
+from agents.game_utils import BoardPiece, PlayerAction, SavedState, NO_PLAYER, INDEX_HIGHEST_ROW, TOP_MASKS
 from typing import Optional, Callable
 
 
@@ -38,15 +38,7 @@ def handle_illegal_moves(board: tuple, column: PlayerAction):
         raise IndexError
 
     mask = board[0] | board[1]
-    column0full = 0b0000000_0000000_0000000_0000000_0000000_0000000_0100000
-    column1full = 0b0000000_0000000_0000000_0000000_0000000_0100000_0000000
-    column2full = 0b0000000_0000000_0000000_0000000_0100000_0000000_0000000
-    column3full = 0b0000000_0000000_0000000_0100000_0000000_0000000_0000000
-    column4full = 0b0000000_0000000_0100000_0000000_0000000_0000000_0000000
-    column5full = 0b0000000_0100000_0000000_0000000_0000000_0000000_0000000
-    column6full = 0b0100000_0000000_0000000_0000000_0000000_0000000_0000000
-    columncheck = [column0full, column1full, column2full, column3full, column4full, column5full, column6full]
-    is_open = mask & columncheck[column] == 0
+    is_open = mask & TOP_MASKS[column] == 0
 
     if not is_open:
         raise ValueError
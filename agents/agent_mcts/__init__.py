@@ -0,0 +1 @@
+from agents.agent_mcts.mcts import generate_move_mcts
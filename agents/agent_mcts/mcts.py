@@ -0,0 +1,221 @@
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+from agents.game_utils import BoardPiece, SavedState, PlayerAction, Position, TOP_MASKS, BOTTOM_MASKS, \
+    COLUMN_MASKS, BOARD_MASK, bitboard_connected_four
+
+"""
+Monte Carlo Tree Search with UCT selection and random playouts on the bitboards.
+"""
+
+COLUMNS = tuple(range(7))
+
+
+class Node:
+    """Node of the search tree
+
+    Attributes
+    ----------
+    key : int
+        Position.key() of the position of the node
+    parent : Node, optional
+    action : int
+        Column played from the parent to reach the node
+    children : list
+        Expanded child nodes
+    untried : list
+        Columns that have not been expanded yet
+    visits : int
+        Number of playouts through the node
+    wins : float
+        Playout results through the node for the player who moved into it (win 1, draw 0.5)
+    result : float, optional
+        Result for the player who moved into the node if the game ends here
+    """
+    __slots__ = ('key', 'parent', 'action', 'children', 'untried', 'visits', 'wins', 'result')
+
+    def __init__(self, key: int, parent: Optional['Node'], action: Optional[int], untried: list,
+                 result: Optional[float] = None):
+        self.key = key
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.result = result
+
+
+class MCTSSavedState(SavedState):
+    """State the MCTS agent keeps between its moves
+
+    Attributes
+    ----------
+    root : Node, optional
+        Root of the tree of the latest move, whose subtrees are reused for the next move
+    iterations : int
+        Playouts of the latest move
+    playouts_per_second : float
+        Playout throughput of the latest move
+    """
+
+    def __init__(self):
+        self.root = None
+        self.iterations = 0
+        self.playouts_per_second = 0.0
+
+
+def generate_move_mcts(
+        board: tuple, player: BoardPiece, saved_state: Optional[SavedState],
+        time_limit: Optional[float] = 1.0, iterations: Optional[int] = None,
+        exploration: float = math.sqrt(2), seed: Optional[int] = None
+) -> Tuple[PlayerAction, Optional[SavedState]]:
+    """Chooses the action with the most playouts after a Monte Carlo Tree Search
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+        Current Board
+    player : BoardPiece
+        Player whose turn it is
+    saved_state : SavedState, optional
+        Tree of the previous move
+    time_limit : float, optional
+        Seconds the search may take
+    iterations : int, optional
+        Number of playouts; the search stops at whichever of the two budgets is used up first,
+        but always runs at least one iteration. At least one of the two budgets must be given
+    exploration : float
+        Weight of the exploration term of UCT
+    seed : int, optional
+        Seed of the playouts
+
+    Returns
+    -------
+    PlayerAction
+        The column the piece will be "dropped" into
+    SavedState
+        A MCTSSavedState holding the tree
+    """
+    if time_limit is None and iterations is None:
+        raise ValueError('generate_move_mcts needs a time_limit or a number of iterations')
+    if not isinstance(saved_state, MCTSSavedState):
+        saved_state = MCTSSavedState()
+    rng = random.Random(seed)
+    position = Position.from_board(board, player)
+
+    # A win does not need a search
+    for col in COLUMNS:
+        if position.can_play(col) and position.is_winning_move(col):
+            saved_state.root = None
+            return PlayerAction(col), saved_state
+
+    root = find_subtree(saved_state.root, position.key())
+    if root is None:
+        root = Node(position.key(), None, None, legal_columns(position.mask))
+    root.parent = None
+
+    t0 = time.perf_counter()
+    deadline = None if time_limit is None else t0 + time_limit
+    # One iteration gives the root a child, so there always is an action to return
+    run_iteration(root, position.current, position.mask, exploration, rng)
+    count = 1
+    while (iterations is None or count < iterations) and (deadline is None or time.perf_counter() < deadline):
+        run_iteration(root, position.current, position.mask, exploration, rng)
+        count += 1
+    elapsed = time.perf_counter() - t0
+
+    saved_state.root = root
+    saved_state.iterations = count
+    saved_state.playouts_per_second = count / elapsed if elapsed > 0 else 0.0
+    best = max(root.children, key=lambda child: child.visits)
+    return PlayerAction(best.action), saved_state
+
+
+def find_subtree(root: Optional[Node], key: int) -> Optional[Node]:
+    """Finds the node of the position with key at most two moves below root"""
+    if root is None:
+        return None
+    if root.key == key:
+        return root
+    for child in root.children:
+        if child.key == key:
+            return child
+        for grandchild in child.children:
+            if grandchild.key == key:
+                return grandchild
+    return None
+
+
+def legal_columns(mask: int) -> list:
+    return [col for col in COLUMNS if not mask & TOP_MASKS[col]]
+
+
+def run_iteration(root: Node, current: int, mask: int, exploration: float, rng: random.Random):
+    """Selects a leaf by UCT, expands it by one child, plays out randomly and propagates the result"""
+    node = root
+    # Selection
+    while not node.untried and node.children and node.result is None:
+        log_visits = math.log(node.visits)
+        node = max(
+            node.children,
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        )
+        mover = current | ((mask + BOTTOM_MASKS[node.action]) & COLUMN_MASKS[node.action])
+        mask |= mover
+        current = mover ^ mask
+
+    # Expansion
+    if node.untried and node.result is None:
+        col = node.untried.pop(rng.randrange(len(node.untried)))
+        mover = current | ((mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col])
+        mask |= mover
+        current = mover ^ mask
+        if bitboard_connected_four(mover):
+            child = Node(current + mask, node, col, [], 1.0)
+        elif mask == BOARD_MASK:
+            child = Node(current + mask, node, col, [], 0.5)
+        else:
+            child = Node(current + mask, node, col, legal_columns(mask))
+        node.children.append(child)
+        node = child
+
+    # Simulation
+    result = node.result if node.result is not None else 1.0 - random_playout(current, mask, rng)
+
+    # Backpropagation
+    while node is not None:
+        node.visits += 1
+        node.wins += result
+        result = 1.0 - result
+        node = node.parent
+
+
+def random_playout(current: int, mask: int, rng: random.Random) -> float:
+    """Plays random legal columns until the game ends
+
+    Parameters
+    ----------
+    current : int
+        Bitboard of the pieces of the player to move
+    mask : int
+        Bitboard of all pieces
+
+    Returns
+    -------
+    float
+        1 if the player to move wins, 0 if the opponent wins and 0.5 for a draw
+    """
+    result = 1.0
+    choice = rng.choice
+    while mask != BOARD_MASK:
+        col = choice([col for col in COLUMNS if not mask & TOP_MASKS[col]])
+        mover = current | ((mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col])
+        if bitboard_connected_four(mover):
+            return result
+        mask |= mover
+        current = mover ^ mask
+        result = 1.0 - result
+    return 0.5
@@ -1,13 +1,96 @@
-from typing import Optional, Tuple
+import time
+from typing import Callable, Optional, Tuple
 
 import numpy as np
 
 from agents.game_utils import BoardPiece, SavedState, PlayerAction, NO_PLAYER, possible_actions, PLAYER1, PLAYER2, \
-    check_end_state, GameState, apply_player_action, connected_four, possible_boards, pretty_print_board
+    check_end_state, GameState, apply_player_action, connected_four, possible_boards, pretty_print_board, \
+    Position, TOP_MASKS, COLUMN_MASKS, BOTTOM_MASK, BOARD_MASK, winning_cells, bitboard_connected_four
+from agents.agent_minimax.transposition_table import TranspositionTable, ArrayTranspositionTable, position_key, \
+    EXACT, LOWER_BOUND, UPPER_BOUND
+from agents.agent_minimax.solver import SearchTimeout, solve_move
+from agents.agent_minimax.search_stats import SearchStats
+
+
+# Columns sorted from the center outwards; central columns take part in the most
+# winning lines, so searching them first produces cutoffs earlier
+CENTER_FIRST_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+# Center-first order with one column moved to the front, indexed by that column (None for none)
+MOVE_ORDERS = {None: CENTER_FIRST_ORDER}
+MOVE_ORDERS.update({
+    first: (first,) + tuple(col for col in CENTER_FIRST_ORDER if col != first) for first in CENTER_FIRST_ORDER
+})
+
+# Positions closer to the leaves than this keep the static order even with a MoveOrdering,
+# their subtrees are too small for the dynamic order to pay for itself
+MIN_ORDERING_DEPTH = 2
+
+
+class StopDeadline:
+    """Deadline for the search that passes once stop is set or, if end is given, at that time
+
+    The search checks `time.perf_counter() > deadline`, which Python evaluates through
+    `deadline.__lt__`, so the search can be stopped from another thread without any extra check.
+
+    Parameters
+    ----------
+    end : float, optional
+        Value of time.perf_counter() at which the deadline passes by itself
+    """
+    __slots__ = ('stop', 'end')
+
+    def __init__(self, end: Optional[float] = None):
+        self.stop = False
+        self.end = end
+
+    def __lt__(self, now: float) -> bool:
+        return self.stop or (self.end is not None and now > self.end)
+
+    def __gt__(self, now: float) -> bool:
+        return not self.__lt__(now)
+
+
+class MinimaxSavedState(SavedState):
+    """State the minimax agent keeps between its moves
+
+    Attributes
+    ----------
+    transposition_table : TranspositionTable or ArrayTranspositionTable
+        Search results of earlier moves, which stay valid for the rest of the game
+    depth_reached : int
+        Depth of the last completed search of the latest move
+    solver_table : TranspositionTable or ArrayTranspositionTable
+        Bounds found by the exact solver, kept apart from the heuristic evaluations
+    score : int, optional
+        Exact score of the latest move if it was solved, see `agents.agent_minimax.solver`
+    stats : SearchStats, optional
+        Counters of the search of the latest move, if they were collected
+    pondered : dict
+        Best action and depth found on the opponent's time, by position_key of the board mapped
+        to PLAYER1, see `agents.agent_minimax.ponder`
+    """
+
+    def __init__(self, table_size: int = 1_000_000, table_mb: Optional[float] = None):
+        if table_mb is None:
+            self.transposition_table = TranspositionTable(table_size)
+            self.solver_table = TranspositionTable(table_size)
+        else:
+            self.transposition_table = ArrayTranspositionTable(table_mb)
+            self.solver_table = ArrayTranspositionTable(table_mb)
+        self.depth_reached = 0
+        self.score = None
+        self.stats = None
+        self.pondered = {}
 
 
 def generate_move_minimax(
-        board: tuple, player: BoardPiece, saved_state: Optional[SavedState]
+        board: tuple, player: BoardPiece, saved_state: Optional[SavedState],
+        depth: int = 5, pruning: bool = True, table_size: int = 1_000_000,
+        time_limit: Optional[float] = None, processes: int = 0, solver_threshold: int = 20,
+        book_path: Optional[str] = None, collect_stats: bool = False,
+        stats_callback: Optional[Callable[[SearchStats], None]] = None, deadline: Optional[StopDeadline] = None,
+        table_mb: Optional[float] = None, move_ordering: bool = True, incremental_eval: bool = True
 ) -> Tuple[PlayerAction, Optional[SavedState]]:
     """Chooses the best action based on the minimax algorithm given a board and the current player
 
@@ -18,12 +101,56 @@ def generate_move_minimax(
     player : BoardPiece
         Player whose turn it is
     saved_state : SavedState, optional
-        Cached results
+        Cached results. If the board was pondered to at least depth, the pondered action is
+        returned without searching
+    depth : int
+        Depth to which the simulation is carried out below each root action
+    pruning : bool
+        If True the search uses alpha-beta pruning with center-first move ordering and a
+        transposition table, otherwise the plain full-width minimax is used
+    table_size : int
+        Maximum number of entries of the transposition table, if saved_state does not have one yet
+    time_limit : float, optional
+        Seconds the move may take. If given, the search is deepened one ply at a time up to depth
+        until the time runs out and the action of the deepest completed search is returned.
+        Only used together with pruning
+    processes : int
+        If greater than 0, the root of the fixed depth search is split over a pool of that many
+        worker processes, which is kept alive for the following moves. The workers use their own
+        transposition tables of table_size entries and time_limit is not used
+    solver_threshold : int
+        Boards with at most this many empty cells are solved exactly instead of searched to depth.
+        With time_limit or deadline, a solve that does not finish in half the time limit, or by
+        the deadline, is abandoned for the iterative deepening. Only used together with pruning
+    book_path : str, optional
+        Opening book file built by `agents.agent_minimax.opening_book`. While all actions lead to
+        positions in the book, the action is taken from it without searching
+    collect_stats : bool
+        If True, counters of the search are stored as saved_state.stats. Only used together with pruning
+    stats_callback : callable, optional
+        Called with the SearchStats of the move when it is chosen; implies collect_stats
+    deadline : StopDeadline, optional
+        Used instead of time_limit for the iterative deepening, so the search can also be stopped
+        from another thread. Only used together with pruning
+    table_mb : float, optional
+        If given and saved_state does not have tables yet, they are ArrayTranspositionTables of
+        this many megabytes each instead of TranspositionTables of table_size entries
+    move_ordering : bool
+        If True, the search orders the children by the transposition table action, killer moves,
+        the threats they create and a history table, see `agents.agent_minimax.move_ordering`,
+        instead of only the transposition table action and center-first. Only used together with
+        pruning and not by the worker processes
+    incremental_eval : bool
+        If True, the search keeps the threat masks and the evaluation of both players up to date
+        while moves are played, see `agents.agent_minimax.threat_position`, instead of evaluating
+        every leaf from scratch. Only used together with pruning and not by the worker processes
 
     Returns
     -------
     PlayerAction
         The column the piece will be "dropped" into
+    SavedState
+        A MinimaxSavedState holding the transposition table when pruning is used
     """
     # The board is always mapped to PLAYER1 so
     # minimax can assume that PLAYER1 is always the maximizing player
@@ -32,7 +159,71 @@ def generate_move_minimax(
         board = map_board_to_player_one(board)
         player = PLAYER1
 
-    depth = 5
+    if book_path is not None:
+        from agents.agent_minimax.opening_book import open_book
+        book_action = open_book(book_path).best_move(Position.from_board(board, player))
+        if book_action is not None:
+            return book_action, saved_state
+
+    if pruning:
+        t0 = time.perf_counter()
+        if not isinstance(saved_state, MinimaxSavedState):
+            saved_state = MinimaxSavedState(table_size, table_mb)
+        stats = SearchStats() if collect_stats or stats_callback is not None else None
+        table = saved_state.transposition_table
+        table.new_search()
+        saved_state.score = None
+        empty_cells = 42 - int.bit_count(board[0] | board[1])
+        pondered = saved_state.pondered.get(position_key(board, PLAYER1))
+        if pondered is not None and pondered[1] >= depth and empty_cells > solver_threshold:
+            best_action, saved_state.depth_reached = pondered
+        elif empty_cells <= solver_threshold and time_limit is None and deadline is None:
+            best_action, saved_state.score = solve_move(
+                Position.from_board(board, player), saved_state.solver_table, stats
+            )
+            saved_state.depth_reached = empty_cells
+        elif empty_cells <= solver_threshold:
+            # Half of a time limit is left for the iterative deepening, in case the solve does not finish
+            search_deadline = t0 + time_limit if deadline is None else deadline
+            try:
+                best_action, saved_state.score = solve_move(
+                    Position.from_board(board, player), saved_state.solver_table, stats,
+                    t0 + time_limit / 2 if deadline is None else deadline
+                )
+                saved_state.depth_reached = empty_cells
+            except SearchTimeout:
+                best_action, saved_state.depth_reached = iterative_deepening(
+                    board, depth, table, search_deadline, stats, incremental=incremental_eval
+                )
+        elif processes > 0:
+            from agents.agent_minimax.parallel_search import parallel_search_root
+            best_action, _ = parallel_search_root(
+                board, depth, processes, 1 if processes <= 7 else 2, stats, table_size
+            )
+            saved_state.depth_reached = depth
+        else:
+            ordering = None
+            if move_ordering:
+                from agents.agent_minimax.move_ordering import MoveOrdering
+                ordering = MoveOrdering()
+            if time_limit is None and deadline is None:
+                best_action, _ = search_root(
+                    board, depth, table, stats=stats, ordering=ordering, incremental=incremental_eval
+                )
+                saved_state.depth_reached = depth
+            else:
+                best_action, saved_state.depth_reached = iterative_deepening(
+                    board, depth, table, t0 + time_limit if deadline is None else deadline, stats, ordering,
+                    incremental_eval
+                )
+        saved_state.stats = stats
+        if stats is not None:
+            stats.seconds = time.perf_counter() - t0
+            if not stats.depth_times:
+                stats.depth_times.append((saved_state.depth_reached, stats.seconds, stats.nodes))
+            if stats_callback is not None:
+                stats_callback(stats)
+        return best_action, saved_state
 
     best_action = 0
     best_evaluation = -999999
@@ -46,6 +237,124 @@ def generate_move_minimax(
     return best_action, saved_state
 
 
+def iterative_deepening(
+        board: tuple, max_depth: int, table: TranspositionTable, deadline: float,
+        stats: Optional[SearchStats] = None, ordering: Optional['MoveOrdering'] = None,
+        incremental: bool = False
+) -> tuple:
+    """Searches the board for PLAYER1 with increasing depth until max_depth or the deadline is reached
+
+    Every iteration starts with the best action of the previous one. The first iteration
+    ignores the deadline, so there always is an action to return.
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+    max_depth : int
+        Deepest search that is started
+    table : TranspositionTable
+        Cache of evaluations shared by all iterations
+    deadline : float or StopDeadline
+        Value of time.perf_counter() at which the running iteration is abandoned
+    stats : SearchStats, optional
+        Counters updated by the search, including the time each depth took
+    ordering : MoveOrdering, optional
+        Killer moves and history table shared by all iterations
+    incremental : bool
+        If True, the evaluation is kept up to date while moves are played, see `alpha_beta`
+
+    Returns
+    -------
+    tuple
+        Best action of the deepest completed iteration and that depth
+    """
+    empty_cells = 42 - int.bit_count(board[0] | board[1])
+    t0 = time.perf_counter()
+    best_action, best_evaluation = search_root(board, 0, table, stats=stats, ordering=ordering, incremental=incremental)
+    depth_reached = 0
+    if stats is not None:
+        stats.depth_times.append((0, time.perf_counter() - t0, stats.nodes))
+    for depth in range(1, min(max_depth, empty_cells - 1) + 1):
+        if best_evaluation >= 100:
+            break
+        t0 = time.perf_counter()
+        try:
+            best_action, best_evaluation = search_root(
+                board, depth, table, best_action, deadline, stats, ordering, incremental
+            )
+        except SearchTimeout:
+            break
+        depth_reached = depth
+        if stats is not None:
+            stats.depth_times.append((depth, time.perf_counter() - t0, stats.nodes))
+    return best_action, depth_reached
+
+
+def search_root(
+        board: tuple, depth: int, table: TranspositionTable, first: Optional[int] = None,
+        deadline: Optional[float] = None, stats: Optional[SearchStats] = None,
+        ordering: Optional['MoveOrdering'] = None, incremental: bool = False
+) -> tuple:
+    """Runs the alpha-beta search on all actions of PLAYER1 on the given board
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+    depth : int
+        Depth to which the simulation is carried out below each action
+    table : TranspositionTable
+        Cache of evaluations
+    first : int, optional
+        Action that is searched first
+    deadline : float, optional
+        Value of time.perf_counter() after which SearchTimeout is raised
+    stats : SearchStats, optional
+        Counters updated by the search
+    ordering : MoveOrdering, optional
+        Killer moves and history table used below the root, see `alpha_beta_position`
+    incremental : bool
+        If True, the evaluation is kept up to date while moves are played, see `alpha_beta`
+
+    Returns
+    -------
+    tuple
+        The best action and its evaluation
+    """
+    best_action = 0
+    best_evaluation = -999999
+    for action in ordered_actions(board, first):
+        temp_evaluation = alpha_beta(
+            apply_player_action(board, action, PLAYER1), PLAYER2, depth, best_evaluation, 999999, table, deadline,
+            stats, ordering, incremental
+        )
+        if temp_evaluation > best_evaluation:
+            best_evaluation = temp_evaluation
+            best_action = action
+    return best_action, best_evaluation
+
+
+def ordered_actions(board: tuple, first: Optional[int] = None) -> list:
+    """Returns the possible actions on the given board ordered from the center column outwards
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+    first : int, optional
+        Column that is moved to the front, e.g. the best action of an earlier search
+
+    Returns
+    -------
+    list
+        The columns that are not full, center columns first
+    """
+    mask = board[0] | board[1]
+    actions = [col for col in CENTER_FIRST_ORDER if not mask & TOP_MASKS[col]]
+    if first is not None and first in actions:
+        actions.remove(first)
+        actions.insert(0, first)
+    return actions
+
+
 def minimax(board: tuple, player: BoardPiece, depth: int) -> int:
     """Evaluates a board for a given player simulated to a given depth to ensure the highest advantage
 
@@ -81,6 +390,209 @@ def minimax(board: tuple, player: BoardPiece, depth: int) -> int:
         return min_evaluation
 
 
+def alpha_beta(
+        board: tuple, player: BoardPiece, depth: int, alpha: int, beta: int,
+        table: Optional[TranspositionTable] = None, deadline: Optional[float] = None,
+        stats: Optional[SearchStats] = None, ordering: Optional['MoveOrdering'] = None,
+        incremental: bool = False
+) -> int:
+    """Evaluates a board like `minimax`, but skips branches that cannot influence the result
+
+    The value is exact whenever it lies strictly between alpha and beta. Otherwise it is
+    only a bound: at most alpha on a fail-low and at least beta on a fail-high.
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+        Current board
+    player : BoardPiece
+        Player whose turn it is
+    depth : int
+        Depth to which the simulation is carried out
+    alpha : int
+        Value PLAYER1 is already guaranteed elsewhere in the tree
+    beta : int
+        Value PLAYER2 is already guaranteed elsewhere in the tree
+    table : TranspositionTable, optional
+        Cache of evaluations, which is read and updated during the search
+    deadline : float, optional
+        Value of time.perf_counter() after which SearchTimeout is raised
+    stats : SearchStats, optional
+        Counters updated by the search
+    ordering : MoveOrdering, optional
+        Killer moves and history table, see `alpha_beta_position`
+    incremental : bool
+        If True, the search runs on a ThreatPosition, which keeps the evaluation up to date while
+        moves are played instead of evaluating every leaf from scratch
+
+    Returns
+    -------
+    int
+        An int representing the advantageousness of a board
+    """
+    if check_end_state(board, player) != GameState.STILL_PLAYING or connected_four(board, other_player(player)):
+        if stats is not None:
+            stats.nodes += 1
+            stats.terminals += 1
+        return heuristic(board)
+    if incremental:
+        from agents.agent_minimax.threat_position import ThreatPosition
+        position = ThreatPosition.from_board(board, player)
+    else:
+        position = Position.from_board(board, player)
+    return alpha_beta_position(position, player, depth, alpha, beta, table, deadline, stats, ordering)
+
+
+def alpha_beta_position(
+        position: Position, player: BoardPiece, depth: int, alpha: int, beta: int,
+        table: Optional[TranspositionTable] = None, deadline: Optional[float] = None,
+        stats: Optional[SearchStats] = None, ordering: Optional['MoveOrdering'] = None
+) -> int:
+    """The search of `alpha_beta`, playing and undoing moves on a single Position
+
+    Moves that win are recognized before they are played, so the position passed in must
+    not be won already and no connected four has to be searched for on the board.
+
+    Parameters
+    ----------
+    position : Position
+        Current position, which is the same again when the function returns. The leaves of a
+        ThreatPosition take its evaluation instead of evaluating the board
+    player : BoardPiece
+        Player whose turn it is
+    ordering : MoveOrdering, optional
+        Killer moves and history of the search; if given, positions at least MIN_ORDERING_DEPTH
+        above the leaves search their children in its order and cutoffs are recorded in it
+
+    See `alpha_beta` for the other parameters and the returned value.
+    """
+    current = position.current
+    mask = position.mask
+    board1 = current if player == PLAYER1 else current ^ mask
+    board2 = board1 ^ mask
+    if stats is not None:
+        stats.nodes += 1
+    if depth == 0 or position.moves == 42:
+        if stats is not None:
+            stats.leaves += 1
+            if position.moves == 42:
+                stats.terminals += 1
+        evaluation = getattr(position, 'evaluation', None)
+        return score_bitboards(board1, board2) if evaluation is None else evaluation
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout
+
+    key = None
+    table_action = None
+    if table is not None:
+        # Same key as position_key(board, player)
+        key = board1 + mask
+        if player == PLAYER2:
+            key |= 1 << 49
+        entry = table.get(key)
+        if stats is not None:
+            stats.table_probes += 1
+        if entry is not None:
+            table_action = entry[3]
+            if entry[0] >= depth:
+                if stats is not None:
+                    stats.table_hits += 1
+                value, bound = entry[1], entry[2]
+                if bound == EXACT:
+                    return value
+                if bound == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+    alpha_start, beta_start = alpha, beta
+
+    # Cells in which a piece would win right now; the board after such a move evaluates to
+    # 100 or -100, which heuristic returns for a connected four
+    winning_moves = winning_cells(current, mask) & ((mask + BOTTOM_MASK) & BOARD_MASK)
+
+    if ordering is not None and depth >= MIN_ORDERING_DEPTH:
+        actions = ordering.order(current, mask, position.moves, 0 if player == PLAYER1 else 1, table_action)
+    else:
+        actions = MOVE_ORDERS[table_action]
+    searched = 0
+
+    best_action = None
+    if player == PLAYER1:
+        best_evaluation = -999999
+        for action in actions:
+            if mask & TOP_MASKS[action]:
+                continue
+            searched += 1
+            if stats is not None:
+                stats.children += 1
+            if winning_moves & COLUMN_MASKS[action]:
+                if stats is not None:
+                    stats.terminals += 1
+                board_evaluation = 100
+            else:
+                position.play(action)
+                board_evaluation = alpha_beta_position(
+                    position, PLAYER2, depth - 1, alpha, beta, table, deadline, stats, ordering
+                )
+                position.undo()
+            if board_evaluation > best_evaluation:
+                best_evaluation = board_evaluation
+                best_action = action
+            alpha = max(alpha, board_evaluation)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if searched == 1:
+                        stats.first_cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(position.moves, 0, action, depth)
+                break
+    else:
+        best_evaluation = 999999
+        for action in actions:
+            if mask & TOP_MASKS[action]:
+                continue
+            searched += 1
+            if stats is not None:
+                stats.children += 1
+            if winning_moves & COLUMN_MASKS[action]:
+                if stats is not None:
+                    stats.terminals += 1
+                board_evaluation = -100
+            else:
+                position.play(action)
+                board_evaluation = alpha_beta_position(
+                    position, PLAYER1, depth - 1, alpha, beta, table, deadline, stats, ordering
+                )
+                position.undo()
+            if board_evaluation < best_evaluation:
+                best_evaluation = board_evaluation
+                best_action = action
+            beta = min(beta, board_evaluation)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if searched == 1:
+                        stats.first_cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(position.moves, 1, action, depth)
+                break
+
+    if stats is not None:
+        stats.expanded += 1
+    if key is not None:
+        if best_evaluation <= alpha_start:
+            bound = UPPER_BOUND
+        elif best_evaluation >= beta_start:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        table.store(key, depth, best_evaluation, bound, best_action)
+    return best_evaluation
+
+
 def heuristic(board: tuple) -> int:
     """Evaluates the advantage of Player 1 on given board
 
@@ -93,12 +605,23 @@ def heuristic(board: tuple) -> int:
     int
         Value greater than 0 indicates an advantage for Player 1 and a values less than 0 a disadvantage
     """
-    if connected_four(board, PLAYER1):
+    return evaluate_bitboards(board[0], board[1])
+
+
+def evaluate_bitboards(board1: int, board2: int) -> int:
+    """Same evaluation as `heuristic`, given the bitboards of Player 1 and Player 2 directly"""
+    if bitboard_connected_four(board1):
         return 100
-    if connected_four(board, PLAYER2):
+    if bitboard_connected_four(board2):
         return -100
-    a = int.bit_count(count_three(board, PLAYER1))*5 + int.bit_count(count_two(board, PLAYER1))*3 + int.bit_count(count_one(board, PLAYER1))
-    b = int.bit_count(count_three(board, PLAYER2))*5 + int.bit_count(count_two(board, PLAYER2))*3 + int.bit_count(count_one(board, PLAYER2))
+    return score_bitboards(board1, board2)
+
+
+def score_bitboards(board1: int, board2: int) -> int:
+    """Evaluation of `heuristic` for a board on which no player has connected four"""
+    invboard = ~(board1 | board2)
+    a = int.bit_count(three_bits(board1, invboard))*5 + int.bit_count(two_bits(board1, invboard))*3 + int.bit_count(one_bits(board1, invboard))
+    b = int.bit_count(three_bits(board2, invboard))*5 + int.bit_count(two_bits(board2, invboard))*3 + int.bit_count(one_bits(board2, invboard))
     return a - b
 
 
@@ -110,6 +633,10 @@ def count_three(board: tuple, player: BoardPiece):
         check = board1
     else:
         check = board2
+    return three_bits(check, invboard)
+
+
+def three_bits(check: int, invboard: int) -> int:
     r7b = check >> 7
     l7b = check << 7
     r14b = check >> 14
@@ -164,8 +691,10 @@ def count_two(board: tuple, player: BoardPiece):
         check = board1
     else:
         check = board2
+    return two_bits(check, invboard)
 
-    invboard = ~(board1 | board2)
+
+def two_bits(check: int, invboard: int) -> int:
     r7b = check >> 7
     r14b = check >> 14
     l7b = check << 7
@@ -213,6 +742,10 @@ def count_one(board: tuple, player: BoardPiece):
         check = board1
     else:
         check = board2
+    return one_bits(check, invboard)
+
+
+def one_bits(check: int, invboard: int) -> int:
     # check horizontal left
     result = invboard & (check >> 7)
 
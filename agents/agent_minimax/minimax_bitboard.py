@@ -1,13 +1,32 @@
 from typing import Optional, Tuple
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
-from agents.game_utils import BoardPiece, SavedState, PlayerAction, NO_PLAYER, possible_actions, PLAYER1, PLAYER2, \
-    check_end_state, GameState, apply_player_action, connected_four, possible_boards, pretty_print_board
+from agents.game_utils import BoardPiece, SavedState, PlayerAction, NO_PLAYER, PLAYER1, PLAYER2, BOARD_ROWS, \
+    BOARD_COLS, INDEX_HIGHEST_ROW
+
+"""
+Minimax on (6, 7) ndarray boards, for callers that hand over boards as arrays.
+
+Row 0 is the lowest row. The evaluation looks at the 69 windows of four cells in which a
+line can be connected, gathered from the flattened board with the precomputed WINDOWS table.
+Every function taking a board also takes a stack of boards shaped (N, 6, 7) and then returns
+one value per board.
+"""
+
+_CELLS = np.arange(BOARD_ROWS * BOARD_COLS).reshape(BOARD_ROWS, BOARD_COLS)
+
+# Flat cell indices of the 69 windows: 24 horizontal, 21 vertical and 12 along each diagonal
+WINDOWS = np.concatenate(
+    [sliding_window_view(_CELLS, 4, axis=1).reshape(-1, 4), sliding_window_view(_CELLS, 4, axis=0).reshape(-1, 4)]
+    + [sliding_window_view(_CELLS.diagonal(offset), 4) for offset in range(-2, 4)]
+    + [sliding_window_view(np.fliplr(_CELLS).diagonal(offset), 4) for offset in range(-2, 4)]
+)
 
 
 def generate_move_minimax(
-        board: np.ndarray, player: BoardPiece, saved_state: Optional[SavedState]
+        board: np.ndarray, player: BoardPiece, saved_state: Optional[SavedState], depth: int = 4
 ) -> Tuple[PlayerAction, Optional[SavedState]]:
     """Chooses the best action based on the minimax algorithm given a board and the current player
 
@@ -19,6 +38,8 @@ def generate_move_minimax(
         Player whose turn it is
     saved_state : SavedState, optional
         Cached results
+    depth : int
+        Depth to which the simulation is carried out below each action
 
     Returns
     -------
@@ -32,8 +53,6 @@ def generate_move_minimax(
         board = map_board_to_player_one(board)
         player = PLAYER1
 
-    depth = 4
-
     best_action = 0
     best_evaluation = -999999
 
@@ -43,12 +62,14 @@ def generate_move_minimax(
             best_evaluation = temp_evaluation
             best_action = action
 
-    return best_action, saved_state
+    return PlayerAction(best_action), saved_state
 
 
 def minimax(board: np.ndarray, player: BoardPiece, depth: int) -> int:
     """Evaluates a board for a given player simulated to a given depth to ensure the highest advantage
 
+    The boards one move above the leaves are evaluated together as one stack.
+
     Parameters
     ----------
     board : np.ndarray
@@ -63,169 +84,114 @@ def minimax(board: np.ndarray, player: BoardPiece, depth: int) -> int:
     int
         An int representing the advantageousness of a board
     """
-    state_of_game = check_end_state(board, player)
-    game_is_lost = check_end_state(board, other_player(player)) == GameState.IS_WIN
-    if depth == 0 or state_of_game != GameState.STILL_PLAYING or game_is_lost:
+    if depth == 0 or is_terminal(board):
         return heuristic(board)
-    if player == PLAYER1:
-        max_evaluation = -999999
-        for x in possible_boards(board, PLAYER1):
-            board_evaluation = minimax(x, PLAYER2, depth - 1)
-            max_evaluation = max(max_evaluation, board_evaluation)
-        return max_evaluation
+    children = [apply_player_action(board, action, player) for action in possible_actions(board)]
+    if depth == 1:
+        evaluations = heuristic(np.stack(children))
     else:
-        min_evaluation = 999999
-        for x in possible_boards(board, PLAYER2):
-            board_evaluation = minimax(x, PLAYER1, depth - 1)
-            min_evaluation = min(min_evaluation, board_evaluation)
-        return min_evaluation
+        evaluations = [minimax(child, other_player(player), depth - 1) for child in children]
+    return int(max(evaluations) if player == PLAYER1 else min(evaluations))
+
+
+def possible_actions(board: np.ndarray) -> list:
+    """Columns whose highest cell is empty"""
+    return np.flatnonzero(board[INDEX_HIGHEST_ROW] == NO_PLAYER).tolist()
 
 
-def heuristic(board: np.ndarray) -> int:
+def apply_player_action(board: np.ndarray, action: PlayerAction, player: BoardPiece) -> np.ndarray:
+    """Returns a copy of the board with a piece of player dropped into the column action"""
+    board = board.copy()
+    board[np.argmax(board[:, action] == NO_PLAYER), action] = player
+    return board
+
+
+def window_counts(board: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Number of pieces of each player in every window
+
+    Parameters
+    ----------
+    board : np.ndarray
+        Board of shape (6, 7) or stack of boards of shape (N, 6, 7)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Counts of PLAYER1 and PLAYER2, of shape (69,) or (N, 69)
+    """
+    windows = board.reshape(board.shape[:-2] + (BOARD_ROWS * BOARD_COLS,))[..., WINDOWS]
+    return np.count_nonzero(windows == PLAYER1, axis=-1), np.count_nonzero(windows == PLAYER2, axis=-1)
+
+
+def heuristic(board: np.ndarray):
     """Evaluates the advantage of Player 1 on given board
 
     Parameters
     ----------
     board : np.ndarray
+        Board of shape (6, 7) or stack of boards of shape (N, 6, 7)
 
     Returns
     -------
-    int
-        Value greater than 0 indicates an advantage for Player 1 and a values less than 0 a disadvantage
+    int or np.ndarray
+        Value greater than 0 indicates an advantage for Player 1 and a values less than 0 a
+        disadvantage; one value per board for a stack
     """
-    if connected_four(board, PLAYER1):
-        return 100
-    if connected_four(board, PLAYER2):
-        return -100
-    a = connected_three(board, PLAYER1) + connected_two(board, PLAYER1)
-    b = connected_three(board, PLAYER2 + connected_two(board, PLAYER2))
-    return a - b
+    ones, twos = window_counts(board)
+    scores = open_windows(ones, twos, 3) + open_windows(ones, twos, 2) \
+        - open_windows(twos, ones, 3) - open_windows(twos, ones, 2)
+    scores = np.where((twos == 4).any(axis=-1), -100, scores)
+    scores = np.where((ones == 4).any(axis=-1), 100, scores)
+    return int(scores) if scores.ndim == 0 else scores
+
 
+def open_windows(mine: np.ndarray, theirs: np.ndarray, pieces: int) -> np.ndarray:
+    """Number of windows holding the given number of own pieces and no piece of the opponent"""
+    return np.count_nonzero((mine == pieces) & (theirs == 0), axis=-1)
 
-def connected_three(board: np.ndarray, player: BoardPiece) -> int:
-    """Counts how many three adjacent pieces equal to 'player' arranged in either direction on the given board
+
+def connected_four(board: np.ndarray, player: BoardPiece):
+    """Whether player has four connected pieces, for a board or every board of a stack"""
+    windows = board.reshape(board.shape[:-2] + (BOARD_ROWS * BOARD_COLS,))[..., WINDOWS]
+    return (windows == player).all(axis=-1).any(axis=-1)
+
+
+def connected_three(board: np.ndarray, player: BoardPiece):
+    """Counts the windows in which player has three pieces and the fourth cell is empty
 
        Parameters
        ----------
        board : np.ndarray
-           Current board
+           Board of shape (6, 7) or stack of boards of shape (N, 6, 7)
        player : BoardPiece
-           Player whose turn it is
+           Player whose pieces are counted
 
        Returns
        -------
-       int
-           Number of three adjacent pieces equal to 'player' arranged in either direction
+       int or np.ndarray
+           Number of such windows, one per board for a stack
        """
-    connect_three_counter = 0
-
-    for x in range(6):
-        counter = 0
-        for y in range(7):
-            if board[x, y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 3:
-                connect_three_counter += 1
-
-    for y in range(7):
-        counter = 0
-        for x in range(6):
-            if board[x, y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 3:
-                connect_three_counter += 1
-
-    offsets = [-2, -1, 0, 1, 2, 3]
-    for x in offsets:
-        counter = 0
-        temp_array = board.diagonal(x)
-        for y in range(len(temp_array)):
-            if temp_array[y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 3:
-                connect_three_counter += 1
-
-    for x in offsets:
-        counter = 0
-        temp_array = np.fliplr(board).diagonal(x)
-        for y in range(len(temp_array)):
-            if temp_array[y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 3:
-                connect_three_counter += 1
-
-    return connect_three_counter
-
-
-def connected_two(board: np.ndarray, player: BoardPiece) -> int:
-    """Counts how many two adjacent pieces equal to 'player' arranged in either direction on the given board
+    ones, twos = window_counts(board)
+    mine, theirs = (ones, twos) if player == PLAYER1 else (twos, ones)
+    counts = open_windows(mine, theirs, 3)
+    return int(counts) if counts.ndim == 0 else counts
 
-       Parameters
-       ----------
-       board : np.ndarray
-           Current board
-       player : BoardPiece
-           Player whose turn it is
 
-       Returns
-       -------
-       int
-           Number of two adjacent pieces equal to 'player' arranged in either direction
+def connected_two(board: np.ndarray, player: BoardPiece):
+    """Counts the windows in which player has two pieces and the other two cells are empty
+
+       See `connected_three` for the parameters.
        """
-    connect_two_counter = 0
-
-    for x in range(6):
-        counter = 0
-        for y in range(7):
-            if board[x, y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 2:
-                connect_two_counter += 1
-
-    for y in range(7):
-        counter = 0
-        for x in range(6):
-            if board[x, y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 2:
-                connect_two_counter += 1
-
-    offsets = [-2, -1, 0, 1, 2, 3]
-    for x in offsets:
-        counter = 0
-        temp_array = board.diagonal(x)
-        for y in range(len(temp_array)):
-            if temp_array[y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 2:
-                connect_two_counter += 1
-
-    for x in offsets:
-        counter = 0
-        temp_array = np.fliplr(board).diagonal(x)
-        for y in range(len(temp_array)):
-            if temp_array[y] == player:
-                counter += 1
-            else:
-                counter = 0
-            if counter == 2:
-                connect_two_counter += 1
-
-    return connect_two_counter
+    ones, twos = window_counts(board)
+    mine, theirs = (ones, twos) if player == PLAYER1 else (twos, ones)
+    counts = open_windows(mine, theirs, 2)
+    return int(counts) if counts.ndim == 0 else counts
+
+
+def is_terminal(board: np.ndarray) -> bool:
+    """Whether a player has won or the board is full"""
+    ones, twos = window_counts(board)
+    return bool((ones == 4).any() or (twos == 4).any() or (board[INDEX_HIGHEST_ROW] != NO_PLAYER).all())
 
 
 def other_player(player: BoardPiece):
@@ -241,20 +207,11 @@ def map_board_to_player_one(board: np.ndarray) -> np.ndarray:
     Parameters
     ----------
     board : np.ndarray
-        Current Board
+        Board of shape (6, 7) or stack of boards of shape (N, 6, 7)
 
     Returns
     -------
     np.ndarray
-        A modified board with the BoardPieces of Player1 and Player2 switched
+        A new board with the BoardPieces of Player1 and Player2 switched
     """
-    for x in range(6):
-        for y in range(7):
-            if board[x, y] == 0:
-                board[x, y] = 0
-            elif board[x, y] == 1:
-                board[x, y] = 2
-            elif board[x, y] == 2:
-                board[x, y] = 1
-
-    return board
\ No newline at end of file
+    return np.where(board == NO_PLAYER, NO_PLAYER, PLAYER1 + PLAYER2 - board).astype(board.dtype)
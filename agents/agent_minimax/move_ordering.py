@@ -0,0 +1,81 @@
+from typing import Optional
+
+from agents.game_utils import BOARD_MASK, BOTTOM_MASKS, COLUMN_MASKS, TOP_MASKS
+from agents.agent_minimax.minimax import CENTER_FIRST_ORDER, three_bits
+
+"""
+Dynamic move ordering for the alpha-beta search.
+
+Children are searched in this order: the action stored in the transposition table, the killer
+moves of the ply, then the other actions by their history score and by the number of threats
+they create, i.e. empty cells that would complete four (the cells `three_bits` marks for
+`count_three`). Ties keep the center-first order. The search only asks for this order in positions at
+least MIN_ORDERING_DEPTH above the leaves.
+"""
+
+_TABLE_ACTION_BONUS = 1 << 60
+_KILLER_BONUS = 1 << 50
+# Fewer cells than this can complete four, so threats only break ties of the history
+_HISTORY_WEIGHT = 64
+
+
+class MoveOrdering:
+    """Killer moves and history table of the searches of one move
+
+    Attributes
+    ----------
+    killers : list
+        The two latest actions per number of pieces on the board that caused a cutoff
+    history : list
+        Per side to move (0 for PLAYER1) and column, the sum of depth * depth of all cutoffs the
+        column caused
+    """
+    __slots__ = ('killers', 'history')
+
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(43)]
+        self.history = [[0] * 7, [0] * 7]
+
+    def order(self, current: int, mask: int, moves: int, side: int, table_action: Optional[int]) -> list:
+        """Playable columns of the position in the order they are searched in
+
+        Parameters
+        ----------
+        current : int
+            Pieces of the player to move
+        mask : int
+            All pieces
+        moves : int
+            Number of pieces on the board
+        side : int
+            0 if PLAYER1 is to move, 1 otherwise
+        table_action : int, optional
+            Best action stored in the transposition table
+        """
+        killers = self.killers[moves]
+        history = self.history[side]
+        scored = []
+        for col in CENTER_FIRST_ORDER:
+            if mask & TOP_MASKS[col]:
+                continue
+            if col == table_action:
+                score = _TABLE_ACTION_BONUS
+            else:
+                move = (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+                threats = int.bit_count(three_bits(current | move, ~(mask | move)) & BOARD_MASK)
+                score = history[col] * _HISTORY_WEIGHT + threats
+                if col == killers[0] or col == killers[1]:
+                    score += _KILLER_BONUS
+            scored.append((score, col))
+        # sort is stable, so equal scores keep the center-first order
+        scored.sort(key=lambda item: -item[0])
+        return [col for _, col in scored]
+
+    def record_cutoff(self, moves: int, side: int, action: int, depth: int):
+        """Remembers an action that caused a cutoff in a position with the given number of pieces"""
+        killers = self.killers[moves]
+        if killers[0] != action:
+            killers[1] = killers[0]
+            killers[0] = action
+        self.history[side][action] += depth * depth
+
@@ -0,0 +1,185 @@
+import argparse
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from agents.game_utils import Position, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import alpha_beta, CENTER_FIRST_ORDER
+
+"""
+Opening book: a file with the scores of all positions up to a given number of pieces.
+
+File layout (little endian):
+    8 bytes  magic b'C4BOOK01'
+    8 bytes  number of positions n (uint64)
+    8 bytes  highest number of pieces of a stored position (uint64)
+    n * 8 bytes  sorted keys (uint64)
+    n * 2 bytes  scores (int16) in the same order
+
+The key of a position is book_key(position). Scores are heuristic evaluations from the point of
+view of the player to move, so the best move leads to the position with the lowest score. The
+heuristic counts cells right of column 6 as empty and so is not exactly mirror symmetric; a
+mirrored position gets the score of the one that was searched.
+"""
+
+BOOK_MAGIC = b'C4BOOK01'
+HEADER_SIZE = 24
+
+# Books are opened once per process and shared by all games
+_open_books = {}
+
+
+def book_key(position: Position) -> int:
+    """Key of a position that is the same for it and its mirror image"""
+    return position.canonical_key()[0]
+
+
+def enumerate_positions(max_ply: int) -> list:
+    """Lists one position of each mirror pair that can occur with 1 to max_ply pieces on the board
+
+    Positions in which a player has already won are left out.
+
+    Returns
+    -------
+    list
+        Tuples (key, current, mask, moves), sorted by key
+    """
+    positions = {}
+    frontier = {book_key(Position()): (0, 0)}
+    for ply in range(1, max_ply + 1):
+        next_frontier = {}
+        for current, mask in frontier.values():
+            position = Position(current, mask, ply - 1)
+            for col in CENTER_FIRST_ORDER:
+                if not position.can_play(col) or position.is_winning_move(col):
+                    continue
+                position.play(col)
+                key = book_key(position)
+                if key not in next_frontier:
+                    next_frontier[key] = (position.current, position.mask)
+                position.undo()
+        for key, (current, mask) in next_frontier.items():
+            positions[key] = (key, current, mask, ply)
+        frontier = next_frontier
+    return [positions[key] for key in sorted(positions)]
+
+
+def score_position(current: int, mask: int, moves: int, depth: int) -> int:
+    """Searches a position to depth and returns its evaluation for the player to move"""
+    player = PLAYER1 if moves % 2 == 0 else PLAYER2
+    board = Position(current, mask, moves).to_board(player)
+    evaluation = alpha_beta(board, player, depth, -999999, 999999)
+    return evaluation if player == PLAYER1 else -evaluation
+
+
+def _score_entry(entry: tuple, depth: int) -> int:
+    return score_position(entry[1], entry[2], entry[3], depth)
+
+
+def build_opening_book(path: str, max_ply: int = 6, depth: int = 6, processes: Optional[int] = None) -> int:
+    """Scores all positions up to max_ply pieces in a process pool and writes them as a book
+
+    Parameters
+    ----------
+    path : str
+        File the book is written to
+    max_ply : int
+        Highest number of pieces of a stored position
+    depth : int
+        Depth to which every position is searched
+    processes : int, optional
+        Number of worker processes, by default one per core
+
+    Returns
+    -------
+    int
+        Number of positions in the book
+    """
+    entries = enumerate_positions(max_ply)
+    with ProcessPoolExecutor(processes) as pool:
+        scores = list(pool.map(_score_entry, entries, [depth] * len(entries), chunksize=64))
+    keys = np.array([entry[0] for entry in entries], dtype='<u8')
+    scores = np.clip(scores, -32768, 32767).astype('<i2')
+    with open(path, 'wb') as file:
+        file.write(BOOK_MAGIC)
+        file.write(np.array([len(keys), max_ply], dtype='<u8').tobytes())
+        file.write(keys.tobytes())
+        file.write(scores.tobytes())
+    return len(keys)
+
+
+class OpeningBook:
+    """Read-only view of a book file through mmap
+
+    The keys and scores are numpy arrays over the mapped file, so nothing is read before it is
+    probed and all processes using the same file share its pages.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != BOOK_MAGIC:
+            self._mmap.close()
+            raise ValueError(f'{path} is not an opening book')
+        size, self.max_ply = (int(x) for x in np.frombuffer(self._mmap, dtype='<u8', count=2, offset=8))
+        self.keys = np.frombuffer(self._mmap, dtype='<u8', count=size, offset=HEADER_SIZE)
+        self.scores = np.frombuffer(self._mmap, dtype='<i2', count=size, offset=HEADER_SIZE + 8 * size)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, position: Position) -> Optional[int]:
+        """Returns the score of the position for the player to move, or None if it is not in the book"""
+        key = book_key(position)
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and int(self.keys[index]) == key:
+            return int(self.scores[index])
+        return None
+
+    def best_move(self, position: Position) -> Optional[int]:
+        """Returns the column leading to the position with the lowest score for the opponent
+
+        A winning move is returned right away. If any other move leads out of the book, None is returned.
+        """
+        if position.moves >= self.max_ply:
+            return None
+        best_col = None
+        best_score = None
+        for col in CENTER_FIRST_ORDER:
+            if not position.can_play(col):
+                continue
+            if position.is_winning_move(col):
+                return col
+            position.play(col)
+            score = self.get(position)
+            position.undo()
+            if score is None:
+                return None
+            if best_score is None or score < best_score:
+                best_col, best_score = col, score
+        return best_col
+
+    def close(self):
+        self.keys = self.scores = None
+        self._mmap.close()
+
+
+def open_book(path: str) -> OpeningBook:
+    """Returns the book stored in path, opening it only the first time it is asked for in this process"""
+    book = _open_books.get(path)
+    if book is None:
+        book = _open_books[path] = OpeningBook(path)
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build an opening book for the minimax agent')
+    parser.add_argument('path', help='file the book is written to')
+    parser.add_argument('--ply', type=int, default=6, help='highest number of pieces of a stored position')
+    parser.add_argument('--depth', type=int, default=6, help='search depth used to score the positions')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+    args = parser.parse_args()
+    count = build_opening_book(args.path, args.ply, args.depth, args.processes)
+    print(f'{count} positions written to {args.path}')
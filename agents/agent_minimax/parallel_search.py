@@ -0,0 +1,157 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from agents.game_utils import PLAYER1, PLAYER2, apply_player_action, check_end_state, GameState
+from agents.agent_minimax.minimax import alpha_beta, ordered_actions
+from agents.agent_minimax.transposition_table import TranspositionTable
+from agents.agent_minimax.search_stats import SearchStats
+
+"""
+Root-split search: the actions of the root (and optionally the replies to them) are searched
+by a pool of worker processes. The pool is kept alive between moves, so each worker also keeps
+its own transposition table warm for the rest of the game.
+"""
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_processes = 0
+_pool_table_size = 0
+_search_count = 0
+
+# Best root evaluation found so far in the current move, written by the main process and
+# read by the workers as alpha at the start of every task
+_shared_alpha = None
+
+# Transposition table of a worker process
+_worker_table: Optional[TranspositionTable] = None
+
+
+def get_process_pool(processes: int, table_size: int = 1_000_000) -> ProcessPoolExecutor:
+    """Returns the pool of search workers, starting it if it does not exist with the given sizes
+
+    Parameters
+    ----------
+    processes : int
+        Number of worker processes
+    table_size : int
+        Maximum number of entries of the transposition table of each worker
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        The warm pool of search workers
+    """
+    global _process_pool, _pool_processes, _pool_table_size, _shared_alpha
+    if _process_pool is None or _pool_processes != processes or _pool_table_size != table_size:
+        shutdown_process_pool()
+        _shared_alpha = multiprocessing.Value('l', -999999)
+        _process_pool = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(_shared_alpha, table_size))
+        _pool_processes = processes
+        _pool_table_size = table_size
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stops the pool of search workers, if there is one"""
+    global _process_pool, _pool_processes, _pool_table_size
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+    _process_pool = None
+    _pool_processes = 0
+    _pool_table_size = 0
+
+
+def _init_worker(shared_alpha, table_size: int):
+    global _shared_alpha, _worker_table
+    _shared_alpha = shared_alpha
+    _worker_table = TranspositionTable(table_size)
+
+
+def _search_task(board: tuple, player, depth: int, search_id: int, collect_stats: bool) -> tuple:
+    # Entries of earlier moves become replaceable, like after new_search() in the main process
+    _worker_table.generation = search_id
+    alpha = _shared_alpha.value
+    stats = SearchStats() if collect_stats else None
+    evaluation = alpha_beta(board, player, depth, alpha, 999999, _worker_table, stats=stats)
+    return evaluation, alpha, None if stats is None else stats.counts()
+
+
+def parallel_search_root(
+        board: tuple, depth: int, processes: int, split_depth: int = 1, stats: Optional[SearchStats] = None,
+        table_size: int = 1_000_000
+) -> tuple:
+    """Searches all actions of PLAYER1 on the given board in the pool of worker processes
+
+    With split_depth 1 every root action is one task. With split_depth 2 every reply to a root
+    action is one task, which gives enough tasks to keep more than 7 workers busy. A task that
+    ends at or below the alpha it started with only proves that its root action is not better
+    than the best one found so far.
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+    depth : int
+        Depth to which the simulation is carried out below each root action
+    processes : int
+        Number of worker processes
+    split_depth : int
+        Ply (1 or 2) at which the tree is split into tasks
+    stats : SearchStats, optional
+        Counters to which the counters of all tasks are added
+    table_size : int
+        Maximum number of entries of the transposition table of each worker
+
+    Returns
+    -------
+    tuple
+        The best action and its evaluation
+    """
+    global _search_count
+    pool = get_process_pool(processes, table_size)
+    _search_count += 1
+    _shared_alpha.value = -999999
+    collect_stats = stats is not None
+
+    futures = {}
+    remaining = {}
+    for action in ordered_actions(board):
+        child = apply_player_action(board, action, PLAYER1)
+        replies = ordered_actions(child)
+        if split_depth == 1 or depth == 0 or not replies or check_end_state(child, PLAYER1) != GameState.STILL_PLAYING:
+            futures[pool.submit(_search_task, child, PLAYER2, depth, _search_count, collect_stats)] = action
+            remaining[action] = 1
+        else:
+            for reply in replies:
+                grandchild = apply_player_action(child, reply, PLAYER2)
+                futures[pool.submit(
+                    _search_task, grandchild, PLAYER1, depth - 1, _search_count, collect_stats
+                )] = action
+            remaining[action] = len(replies)
+
+    evaluations = {}
+    refuted = set()
+    for future in as_completed(futures):
+        action = futures[future]
+        if action in refuted:
+            continue
+        evaluation, alpha, counts = future.result()
+        if collect_stats:
+            stats.add_counts(counts)
+        if evaluation <= alpha:
+            refuted.add(action)
+            for other, other_action in futures.items():
+                if other_action == action:
+                    other.cancel()
+            continue
+        evaluations[action] = min(evaluation, evaluations.get(action, 999999))
+        remaining[action] -= 1
+        if remaining[action] == 0 and evaluations[action] > _shared_alpha.value:
+            _shared_alpha.value = evaluations[action]
+
+    best_action = 0
+    best_evaluation = -999999
+    for action in ordered_actions(board):
+        if action not in refuted and evaluations.get(action, -999999) > best_evaluation:
+            best_evaluation = evaluations[action]
+            best_action = action
+    return best_action, best_evaluation
@@ -0,0 +1,153 @@
+import threading
+from typing import Optional, Tuple
+
+from agents.game_utils import BoardPiece, SavedState, PlayerAction, PLAYER1, PLAYER2, GameState, \
+    apply_player_action, check_end_state
+from agents.agent_minimax.minimax import MinimaxSavedState, SearchTimeout, StopDeadline, generate_move_minimax, \
+    map_board_to_player_one, ordered_actions, search_root
+from agents.agent_minimax.transposition_table import position_key
+
+"""
+Pondering: searching the positions after the opponent's possible replies while the opponent thinks.
+
+After every move of the engine a background thread deepens the search of all replies of the
+opponent, the predicted one first, and writes into the transposition table of the saved state.
+The best action of every completed depth is kept in saved_state.pondered, so when the actual
+reply was pondered deep enough the next move is returned without searching, and otherwise the
+search starts from a warm table.
+"""
+
+
+class Ponderer:
+    """Background search of the replies to the engine's last move
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+        Board after the engine's move
+    player : BoardPiece
+        The engine's player
+    saved_state : MinimaxSavedState
+        State whose transposition table and pondered results are filled
+    max_depth : int
+        Deepest search of each reply
+    solver_threshold : int
+        Replies leaving at most this many empty cells are left to the exact solver and not pondered
+    """
+
+    def __init__(
+            self, board: tuple, player: BoardPiece, saved_state: MinimaxSavedState, max_depth: int,
+            solver_threshold: int = 20
+    ):
+        # Like the search, pondering sees the board from PLAYER1's side
+        self.board = map_board_to_player_one(board) if player == PLAYER2 else board
+        self.saved_state = saved_state
+        self.max_depth = max_depth
+        self.solver_threshold = solver_threshold
+        self.deadline = StopDeadline()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.saved_state.pondered = {}
+        self.saved_state.transposition_table.new_search()
+        self.thread.start()
+
+    def stop(self):
+        """Stops the search and waits for the thread, after which the saved state can be used again"""
+        self.deadline.stop = True
+        self.thread.join()
+
+    def replies(self) -> list:
+        """Children of the board the engine still has to move in, the predicted reply first"""
+        entry = self.saved_state.transposition_table.get(position_key(self.board, PLAYER2))
+        children = []
+        for reply in ordered_actions(self.board, entry[3] if entry is not None else None):
+            child = apply_player_action(self.board, reply, PLAYER2)
+            empty_cells = 42 - int.bit_count(child[0] | child[1])
+            if check_end_state(child, PLAYER2) == GameState.STILL_PLAYING and empty_cells > self.solver_threshold:
+                children.append(child)
+        return children
+
+    def run(self):
+        table = self.saved_state.transposition_table
+        pondered = self.saved_state.pondered
+        children = self.replies()
+        try:
+            for depth in range(self.max_depth + 1):
+                for child in children:
+                    key = position_key(child, PLAYER1)
+                    previous = pondered.get(key)
+                    best_action, _ = search_root(
+                        child, depth, table, previous[0] if previous is not None else None, self.deadline
+                    )
+                    pondered[key] = (best_action, depth)
+        except SearchTimeout:
+            pass
+
+
+class PonderingSavedState(MinimaxSavedState):
+    """MinimaxSavedState that also holds the running Ponderer
+
+    Attributes
+    ----------
+    ponderer : Ponderer, optional
+        Pondering started after the latest move
+    """
+
+    def __init__(self, table_size: int = 1_000_000):
+        super().__init__(table_size)
+        self.ponderer = None
+
+
+def generate_move_pondering(
+        board: tuple, player: BoardPiece, saved_state: Optional[SavedState],
+        depth: int = 5, ponder_depth: Optional[int] = None, table_size: int = 1_000_000,
+        time_limit: Optional[float] = None, solver_threshold: int = 20, book_path: Optional[str] = None
+) -> Tuple[PlayerAction, Optional[SavedState]]:
+    """`generate_move_minimax` that ponders on the opponent's time after each of its moves
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+        Current Board
+    player : BoardPiece
+        Player whose turn it is
+    saved_state : SavedState, optional
+        The PonderingSavedState of the previous move, whose pondering is stopped and reused
+    depth : int
+        Depth of the search, see `generate_move_minimax`
+    ponder_depth : int, optional
+        Deepest search of each reply while pondering, depth + 2 if not given
+    table_size, time_limit, solver_threshold, book_path
+        See `generate_move_minimax`
+
+    Returns
+    -------
+    PlayerAction
+        The column the piece will be "dropped" into
+    SavedState
+        A PonderingSavedState that is pondering the replies to the action
+    """
+    if not isinstance(saved_state, PonderingSavedState):
+        saved_state = PonderingSavedState(table_size)
+    stop_pondering(saved_state)
+
+    action, _ = generate_move_minimax(
+        board, player, saved_state, depth, table_size=table_size, time_limit=time_limit,
+        solver_threshold=solver_threshold, book_path=book_path
+    )
+
+    board = apply_player_action(board, action, player)
+    if check_end_state(board, player) == GameState.STILL_PLAYING:
+        saved_state.ponderer = Ponderer(
+            board, player, saved_state, depth + 2 if ponder_depth is None else ponder_depth, solver_threshold
+        )
+        saved_state.ponderer.start()
+    return action, saved_state
+
+
+def stop_pondering(saved_state: Optional[SavedState]):
+    """Stops the pondering of a PonderingSavedState, e.g. once the game is over; other states are left alone"""
+    if isinstance(saved_state, PonderingSavedState) and saved_state.ponderer is not None:
+        saved_state.ponderer.stop()
+        saved_state.ponderer = None
@@ -0,0 +1,79 @@
+from typing import Optional
+
+
+class SearchStats:
+    """Counters of the search for one move
+
+    Attributes
+    ----------
+    nodes : int
+        Positions the search entered
+    leaves : int
+        Positions evaluated with the heuristic
+    terminals : int
+        Positions in which the game ended, by a connected four or a full board
+    expanded : int
+        Positions whose children were searched
+    children : int
+        Children searched over all expanded positions
+    cutoffs : int
+        Searches of a position stopped early, because a child was good enough
+    first_cutoffs : int
+        Cutoffs caused by the first child searched, see `first_move_cutoff_rate`
+    table_probes : int
+        Look-ups in the transposition table
+    table_hits : int
+        Look-ups that found an entry deep enough to narrow the search window or end the search
+    depth_times : list
+        Tuples (depth, seconds, nodes) of every completed search depth, nodes counted from the start of the move
+    seconds : float
+        Duration of the whole move
+    """
+    __slots__ = (
+        'nodes', 'leaves', 'terminals', 'expanded', 'children', 'cutoffs', 'first_cutoffs', 'table_probes',
+        'table_hits', 'depth_times', 'seconds'
+    )
+
+    # Counters which are added up when the stats of several searches are merged
+    COUNTERS = (
+        'nodes', 'leaves', 'terminals', 'expanded', 'children', 'cutoffs', 'first_cutoffs', 'table_probes',
+        'table_hits'
+    )
+
+    def __init__(self):
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+        self.depth_times = []
+        self.seconds = 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """Average number of children searched per expanded position"""
+        return self.children / self.expanded if self.expanded else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of the cutoffs caused by the first child, the closer to 1 the better the move ordering"""
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def counts(self) -> tuple:
+        return tuple(getattr(self, counter) for counter in self.COUNTERS)
+
+    def add_counts(self, counts: tuple):
+        """Adds the counters returned by `counts` of another search, e.g. one of a worker process"""
+        for counter, count in zip(self.COUNTERS, counts):
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def as_dict(self) -> dict:
+        stats = {counter: getattr(self, counter) for counter in self.COUNTERS}
+        stats['branching_factor'] = self.branching_factor
+        stats['first_move_cutoff_rate'] = self.first_move_cutoff_rate
+        stats['depth_times'] = list(self.depth_times)
+        stats['seconds'] = self.seconds
+        return stats
+
+
+def search_nodes(saved_state) -> Optional[int]:
+    """Number of nodes the last search visited, if the agent collected SearchStats in its SavedState"""
+    stats = getattr(saved_state, 'stats', None)
+    return None if stats is None else stats.nodes
@@ -0,0 +1,212 @@
+import time
+from typing import Optional
+
+from agents.game_utils import Position, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, winning_cells, mirror_bitboard
+from agents.agent_minimax.transposition_table import TranspositionTable, LOWER_BOUND, UPPER_BOUND
+from agents.agent_minimax.search_stats import SearchStats
+
+"""
+Exact solver for positions near the end of the game.
+
+Scores are given for the player whose turn it is: 0 is a draw, a positive score is a win and a
+negative score a loss. A win in which the winner connects four with their k-th piece scores
+22 - k, a loss in which the opponent does so scores -(22 - k). Faster wins and slower losses
+therefore score higher.
+"""
+
+# Center-first column order, ties of the move ordering are broken by it
+SOLVER_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search once the deadline of the current move has passed"""
+
+
+def solve(
+        position: Position, table: Optional[TranspositionTable] = None, stats: Optional[SearchStats] = None,
+        deadline: Optional[float] = None
+) -> int:
+    """Computes the exact score of a position by repeated null-window searches
+
+    Each null-window search only tells whether the score is above or below a guess, which
+    prunes far more than a search with a wide window. The guesses bisect the range of possible
+    scores, moved towards 0 first because most positions are close to a draw.
+
+    Parameters
+    ----------
+    position : Position
+        Position to solve, which is the same again when the function returns
+    table : TranspositionTable, optional
+        Cache of bounds found by earlier searches. It must only be shared with other solver searches
+    stats : SearchStats, optional
+        Counters updated by the search
+    deadline : float or StopDeadline, optional
+        Value of time.perf_counter() after which SearchTimeout is raised; the position is then
+        left with the moves of the abandoned search played
+
+    Returns
+    -------
+    int
+        The score of the position
+    """
+    if table is None:
+        table = TranspositionTable()
+    if position.can_win_next():
+        return (43 - position.moves) // 2
+    low = -((42 - position.moves) // 2)
+    high = (43 - position.moves) // 2
+    while low < high:
+        guess = low + (high - low) // 2
+        if guess <= 0 and -(-low // 2) < guess:
+            guess = -(-low // 2)
+        elif guess >= 0 and high // 2 > guess:
+            guess = high // 2
+        score = negamax(position, guess, guess + 1, table, stats, deadline)
+        if score <= guess:
+            high = score
+        else:
+            low = score
+    return low
+
+
+def solve_move(
+        position: Position, table: Optional[TranspositionTable] = None, stats: Optional[SearchStats] = None,
+        deadline: Optional[float] = None
+) -> tuple:
+    """Finds a column that reaches the exact score of the position
+
+    Parameters
+    ----------
+    position : Position
+        Position to solve, which must have a column that is not full
+    table : TranspositionTable, optional
+        Cache of bounds found by earlier searches
+    stats : SearchStats, optional
+        Counters updated by the search
+    deadline : float or StopDeadline, optional
+        Value of time.perf_counter() after which SearchTimeout is raised, see `solve`
+
+    Returns
+    -------
+    tuple
+        The column and the score of the position
+    """
+    if table is None:
+        table = TranspositionTable()
+    playable = position.playable_cells()
+    for col in SOLVER_ORDER:
+        if playable & COLUMN_MASKS[col] and position.is_winning_move(col):
+            return col, (43 - position.moves) // 2
+    score = solve(position, table, stats, deadline)
+    candidates = sorted_moves(position, non_losing_moves(position))
+    for col in candidates:
+        position.play(col)
+        # The move reaches score if the score of the opponent afterwards is at most -score
+        reply_score = negamax(position, -score, -score + 1, table, stats, deadline)
+        position.undo()
+        if reply_score <= -score:
+            return col, score
+    if candidates:
+        return candidates[0], score
+    return next(col for col in SOLVER_ORDER if playable & COLUMN_MASKS[col]), score
+
+
+def negamax(
+        position: Position, alpha: int, beta: int, table: TranspositionTable, stats: Optional[SearchStats] = None,
+        deadline: Optional[float] = None
+) -> int:
+    """Searches the score of a position in which the player to move cannot win at once
+
+    Returns the exact score if it lies strictly between alpha and beta, otherwise a bound:
+    at most alpha on a fail-low and at least beta on a fail-high. Raises SearchTimeout once
+    time.perf_counter() passes deadline.
+    """
+    possible = non_losing_moves(position)
+    moves = position.moves
+    if stats is not None:
+        stats.nodes += 1
+    if not possible or moves >= 40:
+        if stats is not None:
+            stats.terminals += 1
+        return -((42 - moves) // 2) if not possible else 0
+
+    # Neither player can win during the next move, which narrows the possible scores
+    lowest = -((40 - moves) // 2)
+    if alpha < lowest:
+        alpha = lowest
+        if alpha >= beta:
+            return alpha
+    highest = (41 - moves) // 2
+    if beta > highest:
+        beta = highest
+        if alpha >= beta:
+            return beta
+
+    # Mirror images have the same score, so both share the entry of the smaller key
+    key = position.current + position.mask
+    key = min(key, mirror_bitboard(key))
+    entry = table.get(key)
+    if stats is not None:
+        stats.table_probes += 1
+        stats.table_hits += entry is not None
+    if entry is not None:
+        if entry[2] == LOWER_BOUND:
+            if alpha < entry[1]:
+                alpha = entry[1]
+                if alpha >= beta:
+                    return alpha
+        elif beta > entry[1]:
+            beta = entry[1]
+            if alpha >= beta:
+                return beta
+
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout
+    if stats is not None:
+        stats.expanded += 1
+    for searched, col in enumerate(sorted_moves(position, possible)):
+        if stats is not None:
+            stats.children += 1
+        position.play(col)
+        score = -negamax(position, -beta, -alpha, table, stats, deadline)
+        position.undo()
+        if score >= beta:
+            if stats is not None:
+                stats.cutoffs += 1
+                stats.first_cutoffs += searched == 0
+            table.store(key, 0, score, LOWER_BOUND)
+            return score
+        if score > alpha:
+            alpha = score
+    table.store(key, 0, alpha, UPPER_BOUND)
+    return alpha
+
+
+def non_losing_moves(position: Position) -> int:
+    """Bitboard of the cells the player to move can play without letting the opponent win next
+
+    If the opponent threatens to win in two playable cells at once, there is no such cell.
+    """
+    mask = position.mask
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    opponent_wins = winning_cells(position.current ^ mask, mask)
+    forced = possible & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            return 0
+        possible = forced
+    # Never play right below a cell the opponent would win in
+    return possible & ~(opponent_wins >> 1)
+
+
+def sorted_moves(position: Position, moves: int) -> list:
+    """Orders the columns of the cells in moves by how many winning cells they create for the player to move"""
+    current = position.current
+    mask = position.mask
+    scored = []
+    for col in SOLVER_ORDER:
+        move = moves & COLUMN_MASKS[col]
+        if move:
+            scored.append((-int.bit_count(winning_cells(current | move, mask | move)), len(scored), col))
+    scored.sort()
+    return [col for _, _, col in scored]
@@ -0,0 +1,171 @@
+from itertools import combinations
+from typing import Optional
+
+from agents.game_utils import BoardPiece, Position, PLAYER1, BOTTOM_MASKS, COLUMN_MASKS, BOARD_MASK, \
+    bitboard_connected_four
+from agents.agent_minimax.minimax import three_bits, two_bits, one_bits
+
+"""
+Position that keeps the evaluation of `heuristic` up to date while moves are played and undone.
+
+Per player it keeps the masks of `three_bits`, `two_bits` and `one_bits`, whether the player has
+connected four, and the player's part of the score. Every cell of these masks depends only on the
+player's pieces within three cells of it along one line. A move therefore only adds cells that
+`LINE_THREATS` of the played cell lists for the player's pieces on the four lines through it, and
+the opponent's masks just lose the filled cell. A move wins exactly if it fills a cell of the
+mover's three mask. `undo` restores the state saved by `play`, so reading the evaluation at a
+leaf costs nothing.
+"""
+
+# Bit distance between neighbouring cells: horizontal, both diagonals and vertical
+_DIRECTIONS = (7, 8, 6, 1)
+
+
+def _line_threats(move: int) -> tuple:
+    """Tuples (segment, threats) of the four lines through the cell of move
+
+    segment holds the cells of the board at most three steps from the cell along the line.
+    threats maps every set of pieces within segment that contains the cell to the masks of
+    `three_bits`, `two_bits` and `one_bits` of these pieces alone, before removing occupied cells.
+    """
+    cell = move.bit_length() - 1
+    lines = []
+    for direction in _DIRECTIONS:
+        others = [
+            1 << (cell + step * direction) for step in (-3, -2, -1, 1, 2, 3)
+            if cell + step * direction >= 0 and (1 << (cell + step * direction)) & BOARD_MASK
+        ]
+        segment = move | sum(others)
+        threats = {}
+        for count in range(len(others) + 1):
+            for pieces in combinations(others, count):
+                check = move | sum(pieces)
+                threats[check] = (three_bits(check, -1), two_bits(check, -1), one_bits(check, -1))
+        lines.append((segment, threats))
+    return tuple(lines)
+
+
+# Lines through every cell of the board, keyed by the bit of the cell
+LINE_THREATS = {
+    1 << (7 * col + row): _line_threats(1 << (7 * col + row)) for col in range(7) for row in range(6)
+}
+
+
+def threat_state(check: int, invboard: int, won: bool) -> tuple:
+    """Masks, connected four and part of the score of one player
+
+    Parameters
+    ----------
+    check : int
+        Bitboard of the player
+    invboard : int
+        Complement of all pieces, as `count_three` builds it
+    won : bool
+        Whether the player has connected four
+
+    Returns
+    -------
+    tuple
+        Masks of `three_bits`, `two_bits` and `one_bits`, won and the part of the score
+    """
+    threes = three_bits(check, invboard)
+    twos = two_bits(check, invboard)
+    ones = one_bits(check, invboard)
+    score = int.bit_count(threes) * 5 + int.bit_count(twos) * 3 + int.bit_count(ones)
+    return threes, twos, ones, won, score
+
+
+class ThreatPosition(Position):
+    """Position whose `evaluation` equals `heuristic` of its board at all times
+
+    Attributes
+    ----------
+    side : int
+        0 if PLAYER1 is to move, 1 otherwise
+    threats : tuple
+        `threat_state` of PLAYER1 and PLAYER2
+    evaluation : int
+        Value of `heuristic` for the board
+    saved : list
+        Threats and evaluation before every move played, needed by `undo`
+    """
+    __slots__ = ('side', 'threats', 'evaluation', 'saved')
+
+    def __init__(self, current: int = 0, mask: int = 0, moves: Optional[int] = None, player: BoardPiece = PLAYER1):
+        super().__init__(current, mask, moves)
+        self.side = 0 if player == PLAYER1 else 1
+        other = current ^ mask
+        board1, board2 = (current, other) if self.side == 0 else (other, current)
+        invboard = ~mask
+        self.threats = (
+            threat_state(board1, invboard, bitboard_connected_four(board1)),
+            threat_state(board2, invboard, bitboard_connected_four(board2)),
+        )
+        self.evaluation = self.evaluate()
+        self.saved = []
+
+    @classmethod
+    def from_board(cls, board: tuple, player: BoardPiece) -> 'ThreatPosition':
+        """Creates the position of a board tuple in which it is player's turn"""
+        current = board[0] if player == PLAYER1 else board[1]
+        return cls(current, board[0] | board[1], player=player)
+
+    def evaluate(self) -> int:
+        """Evaluation of `heuristic` from the threat states"""
+        state1, state2 = self.threats
+        if state1[3]:
+            return 100
+        if state2[3]:
+            return -100
+        return state1[4] - state2[4]
+
+    def play(self, col: int):
+        """Drops a piece of the player whose turn it is into col, which must not be full"""
+        side = self.side
+        threats = self.threats
+        evaluation = self.evaluation
+        self.saved.append((threats, evaluation))
+        mask = self.mask
+        move = (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+        check = self.current | move
+        invboard = ~(mask | move)
+        mine = threats[side]
+        threes, twos, ones = mine[0], mine[1], mine[2]
+        for segment, line_threats in LINE_THREATS[move]:
+            added = line_threats[check & segment]
+            threes |= added[0]
+            twos |= added[1]
+            ones |= added[2]
+        threes &= invboard
+        twos &= invboard
+        ones &= invboard
+        mine = (
+            threes, twos, ones, mine[3] or bool(mine[0] & move),
+            int.bit_count(threes) * 5 + int.bit_count(twos) * 3 + int.bit_count(ones)
+        )
+        theirs = threats[1 - side]
+        if theirs[0] & move or theirs[1] & move or theirs[2] & move:
+            keep = ~move
+            theirs = (
+                theirs[0] & keep, theirs[1] & keep, theirs[2] & keep, theirs[3],
+                theirs[4] - bool(theirs[0] & move) * 5 - bool(theirs[1] & move) * 3 - bool(theirs[2] & move)
+            )
+        if side == 0:
+            self.threats = (mine, theirs)
+            self.evaluation = 100 if mine[3] else -100 if theirs[3] else mine[4] - theirs[4]
+        else:
+            self.threats = (theirs, mine)
+            self.evaluation = 100 if theirs[3] else -100 if mine[3] else theirs[4] - mine[4]
+        self.side = 1 - side
+        self.history.append(move)
+        self.current ^= mask
+        self.mask = mask | move
+        self.moves += 1
+
+    def undo(self):
+        """Takes back the last piece played"""
+        self.threats, self.evaluation = self.saved.pop()
+        self.side = 1 - self.side
+        self.mask ^= self.history.pop()
+        self.current ^= self.mask
+        self.moves -= 1
@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from agents.game_utils import BoardPiece, PLAYER2
+
+# Bound types of stored evaluations
+EXACT = 0  # The stored value is the exact value of the position
+LOWER_BOUND = 1  # The search failed high, the real value is at least the stored value
+UPPER_BOUND = 2  # The search failed low, the real value is at most the stored value
+
+
+def position_key(board: tuple, player: BoardPiece) -> int:
+    """Builds a unique integer key for a board and the player whose turn it is
+
+    board1 + mask sets, in every column, the bit right above the highest piece and keeps the
+    pieces of player 1 below it, so no two boards share the same sum. The player to move is
+    stored in bit 49, since the search also runs on boards with swapped pieces. Mirror images
+    keep separate keys, because `heuristic` counts the cells right of column 6 as empty and
+    therefore evaluates them differently.
+
+    Parameters
+    ----------
+    board : tuple of player bitboards
+    player : BoardPiece
+        Player whose turn it is
+
+    Returns
+    -------
+    int
+        Key of the position
+    """
+    key = board[0] + (board[0] | board[1])
+    if player == PLAYER2:
+        key |= 1 << 49
+    return key
+
+
+class TranspositionTable:
+    """Cache of search results keyed on `position_key`
+
+    Each entry is a tuple (depth, value, bound, best_action, generation). Once `max_entries` is reached the
+    entry that was stored least recently is dropped for a new one. An entry of the current search
+    is only overwritten by a result of at least the same depth.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        # Ordered by the time of storing, so the oldest entry is dropped in constant time
+        self.entries = OrderedDict()
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def new_search(self):
+        """Marks all stored entries as results of an earlier search, so they can be replaced"""
+        self.generation += 1
+
+    def get(self, key: int) -> Optional[tuple]:
+        return self.entries.get(key)
+
+    def store(self, key: int, depth: int, value: int, bound: int, best_action: Optional[int] = None):
+        entries = self.entries
+        old = entries.get(key)
+        if old is not None:
+            if old[0] > depth and old[4] == self.generation:
+                return
+            entries.move_to_end(key)
+        elif len(entries) >= self.max_entries:
+            entries.popitem(last=False)
+        entries[key] = (depth, value, bound, best_action, self.generation)
+
+    def clear(self):
+        self.entries.clear()
+        self.generation = 0
+
+
+class ArrayTranspositionTable:
+    """Transposition table of fixed size in preallocated numpy arrays, with the interface of TranspositionTable
+
+    The table has `buckets` buckets of two entries; key k goes to bucket k % buckets. The first
+    entry of a bucket keeps the deepest result of the current search, of equal depths the one
+    stored first, and is only updated in place by a result of the same key that is at least as
+    deep. The second entry takes every result the first one refuses. The solver stores all
+    results with depth 0, so there the first entry keeps the first key of the bucket and the
+    second one the latest. Per entry the arrays hold the key plus one, so that 0
+    marks an empty entry, the depth, value, bound and generation packed into one int64, and the
+    best action, -1 for none, in one int8; 17 bytes in total.
+
+    Parameters
+    ----------
+    size_mb : float
+        Memory of the arrays in megabytes
+    """
+
+    ENTRY_BYTES = 17
+
+    def __init__(self, size_mb: float = 16):
+        self.buckets = max(1, int(size_mb * (1 << 20)) // (2 * self.ENTRY_BYTES))
+        self.keys = np.zeros(2 * self.buckets, dtype=np.uint64)
+        self.data = np.zeros(2 * self.buckets, dtype=np.int64)
+        self.actions = np.full(2 * self.buckets, -1, dtype=np.int8)
+        self.generation = 0
+        self._make_views()
+
+    def _make_views(self):
+        # Indexing memoryviews of the arrays gives Python ints, which is much faster than numpy scalars
+        self._keys = memoryview(self.keys)
+        self._data = memoryview(self.data)
+        self._actions = memoryview(self.actions)
+
+    def __getstate__(self) -> dict:
+        # Memoryviews cannot be pickled; they are made again from the arrays when unpickling
+        return {name: value for name, value in self.__dict__.items() if not name.startswith('_')}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._make_views()
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.data.nbytes + self.actions.nbytes
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.keys))
+
+    def new_search(self):
+        """Marks all stored entries as results of an earlier search, so they can be replaced"""
+        self.generation += 1
+
+    def get(self, key: int) -> Optional[tuple]:
+        index = 2 * (key % self.buckets)
+        stored = key + 1
+        keys = self._keys
+        if keys[index] != stored:
+            index += 1
+            if keys[index] != stored:
+                return None
+        data = self._data[index]
+        action = self._actions[index]
+        # data: value in bits 32 to 63, generation in bits 8 to 23, depth in bits 2 to 7, bound in bits 0 and 1
+        return (data >> 2) & 0x3F, data >> 32, data & 0x3, None if action < 0 else action, (data >> 8) & 0xFFFF
+
+    def store(self, key: int, depth: int, value: int, bound: int, best_action: Optional[int] = None):
+        index = 2 * (key % self.buckets)
+        stored = key + 1
+        keys = self._keys
+        data = self._data
+        generation = self.generation & 0xFFFF
+        first = data[index]
+        if keys[index] == stored:
+            # A shallower result never replaces a deeper one of the same search
+            if ((first >> 8) & 0xFFFF) == generation and ((first >> 2) & 0x3F) > depth:
+                return
+        elif keys[index] == 0 or ((first >> 8) & 0xFFFF) != generation or ((first >> 2) & 0x3F) < depth:
+            if keys[index + 1] == stored:
+                keys[index + 1] = 0
+        else:
+            index += 1
+        keys[index] = stored
+        data[index] = (value << 32) | (generation << 8) | (depth << 2) | bound
+        self._actions[index] = -1 if best_action is None else best_action
+
+    def clear(self):
+        """Empties the table without reallocating it"""
+        self.keys.fill(0)
+        self.actions.fill(-1)
+        self.generation = 0
@@ -0,0 +1,92 @@
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from agents.game_utils import BOTTOM_MASKS, COLUMN_MASKS, TOP_MASKS
+from agents.agent_minimax.batch_heuristic import connected_four_batch
+
+"""
+Random games played many at a time on numpy uint64 bitboards.
+
+Every step advances all unfinished games of a batch by one uniformly random legal move, so a
+batch is done after at most 42 steps whatever its size.
+"""
+
+_BOTTOM = np.array(BOTTOM_MASKS, dtype=np.uint64)
+_COLUMN = np.array(COLUMN_MASKS, dtype=np.uint64)
+_TOP = np.array(TOP_MASKS, dtype=np.uint64)
+
+
+def play_random_batch(count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Plays count random games from the empty board to their end
+
+    Parameters
+    ----------
+    count : int
+        Number of games
+    rng : np.random.Generator
+        Source of the moves
+
+    Returns
+    -------
+    np.ndarray
+        int8 moves of shape (count, 42), padded with -1 after the last move
+    np.ndarray
+        int8 number of moves of every game
+    np.ndarray
+        int8 winner of every game: 1 or 2 for PLAYER1 or PLAYER2, 0 for a draw
+    """
+    moves = np.full((count, 42), -1, dtype=np.int8)
+    lengths = np.full(count, 42, dtype=np.int8)
+    winners = np.zeros(count, dtype=np.int8)
+    current = np.zeros(count, dtype=np.uint64)  # pieces of the player to move
+    mask = np.zeros(count, dtype=np.uint64)
+    active = np.arange(count)
+    for ply in range(42):
+        # Random legal column: the largest random key among the columns that are not full
+        keys = rng.random((active.size, 7))
+        keys[(mask[:, None] & _TOP) != 0] = -1.0
+        cols = keys.argmax(axis=1)
+        moves[active, ply] = cols
+
+        mover = current | ((mask + _BOTTOM[cols]) & _COLUMN[cols])
+        mask = mask | mover
+        current = mover ^ mask
+
+        won = connected_four_batch(mover)
+        if won.any():
+            finished = active[won]
+            lengths[finished] = ply + 1
+            winners[finished] = 1 + ply % 2
+            still = ~won
+            active, current, mask = active[still], current[still], mask[still]
+            if not active.size:
+                break
+    return moves, lengths, winners
+
+
+def random_games(
+        count: Optional[int] = None, batch_size: int = 65_536, seed: Optional[int] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Streams finished random games in batches
+
+    Parameters
+    ----------
+    count : int, optional
+        Total number of games, endless if not given
+    batch_size : int
+        Number of games played at once
+    seed : int, optional
+        Seed of the moves
+
+    Yields
+    ------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Moves, lengths and winners of a batch of games, as returned by `play_random_batch`
+    """
+    rng = np.random.default_rng(seed)
+    while count is None or count > 0:
+        size = batch_size if count is None else min(batch_size, count)
+        yield play_random_batch(size, rng)
+        if count is not None:
+            count -= size
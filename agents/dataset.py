@@ -0,0 +1,224 @@
+import argparse
+import mmap
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+from agents.game_utils import Position, BOTTOM_MASKS, COLUMN_MASKS
+
+"""
+Position dataset: a file of fixed size records, read through numpy.memmap.
+
+File layout (little endian):
+    8 bytes  magic b'C4DATA01'
+    8 bytes  size of a record in bytes (uint64)
+    n * 20 bytes  records, packed without padding:
+        current  uint64  pieces of the player to move
+        mask     uint64  all pieces
+        ply      uint8   number of pieces
+        score    int16   score of the position for the player to move, see flags
+        flags    uint8   SCORED, EXACT and OUTCOME bits
+
+The number of records follows from the file size, so writers only ever append. Positions use
+the layout of `agents.game_utils.Position`; player 1 is to move when ply is even.
+"""
+
+DATASET_MAGIC = b'C4DATA01'
+HEADER_SIZE = 16
+
+RECORD_DTYPE = np.dtype([
+    ('current', '<u8'), ('mask', '<u8'), ('ply', 'u1'), ('score', '<i2'), ('flags', 'u1'),
+])
+
+_BOTTOM = np.array(BOTTOM_MASKS, dtype=np.uint64)
+_COLUMN = np.array(COLUMN_MASKS, dtype=np.uint64)
+
+SCORED = 1  # The score is set
+EXACT = 2  # The score is exact, in the convention of agents.agent_minimax.solver
+OUTCOME = 4  # The score is the result of the game the position was taken from: 1 win, 0 draw, -1 loss
+
+
+class DatasetWriter:
+    """Appends records to a dataset file, creating it if needed
+
+    Records are collected in memory and written in blocks of buffer_size. Use it as a
+    context manager or call close, otherwise the last block is lost.
+
+    Parameters
+    ----------
+    path : str
+        Dataset file
+    buffer_size : int
+        Records written at once
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            check_header(path)
+        self.file = open(path, 'ab')
+        if not exists:
+            self.file.write(DATASET_MAGIC + np.uint64(RECORD_DTYPE.itemsize).astype('<u8').tobytes())
+        self.buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        self.written = 0
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write(self, current: int, mask: int, ply: int, score: int = 0, flags: int = 0):
+        """Adds one record"""
+        if self.buffered == len(self.buffer):
+            self.flush()
+        self.buffer[self.buffered] = (current, mask, ply, score, flags)
+        self.buffered += 1
+
+    def write_position(self, position: Position, score: Optional[int] = None, flags: int = 0):
+        """Adds a position, marking it SCORED if a score is given"""
+        if score is None:
+            self.write(position.current, position.mask, position.moves, 0, flags & ~SCORED)
+        else:
+            self.write(position.current, position.mask, position.moves, score, flags | SCORED)
+
+    def write_arrays(
+            self, current: np.ndarray, mask: np.ndarray, plies: np.ndarray, scores: Optional[np.ndarray] = None,
+            flags: int = 0
+    ):
+        """Adds many positions, e.g. those of `agents.notation.load_position_file`, marking them
+        SCORED if scores are given"""
+        self.flush()
+        records = np.zeros(len(current), dtype=RECORD_DTYPE)
+        records['current'] = current
+        records['mask'] = mask
+        records['ply'] = plies
+        if scores is None:
+            records['flags'] = flags & ~SCORED
+        else:
+            records['score'] = scores
+            records['flags'] = flags | SCORED
+        self.file.write(records.tobytes())
+        self.written += len(records)
+
+    def write_games(self, moves: np.ndarray, lengths: np.ndarray, winners: np.ndarray):
+        """Adds every position of finished games, game by game, scored with the OUTCOME of the game
+
+        Parameters
+        ----------
+        moves, lengths, winners : np.ndarray
+            Games as returned by `agents.agent_random.batch_playout.play_random_batch`; the
+            positions before each move are added
+        """
+        count = len(lengths)
+        winners = np.asarray(winners)
+        current = np.zeros(count, dtype=np.uint64)
+        mask = np.zeros(count, dtype=np.uint64)
+        games, chunks = [], []
+        for ply in range(int(np.max(lengths)) if count else 0):
+            playing = np.flatnonzero(lengths > ply)
+            # Player 1 is to move on even plies
+            scores = np.where(winners[playing] == 0, 0, np.where(winners[playing] == 1 + ply % 2, 1, -1))
+            games.append(playing)
+            chunks.append((current[playing], mask[playing], np.full(len(playing), ply, dtype=np.uint8), scores))
+            cols = np.asarray(moves)[playing, ply]
+            mover = current[playing] | ((mask[playing] + _BOTTOM[cols]) & _COLUMN[cols])
+            mask[playing] |= mover
+            current[playing] = mover ^ mask[playing]
+        if not chunks:
+            return
+        order = np.argsort(np.concatenate(games), kind='stable')
+        self.write_arrays(*(np.concatenate(field)[order] for field in zip(*chunks)), flags=OUTCOME)
+
+    def flush(self):
+        if self.buffered:
+            self.file.write(self.buffer[:self.buffered].tobytes())
+            self.written += self.buffered
+            self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def check_header(path: str):
+    with open(path, 'rb') as file:
+        header = file.read(HEADER_SIZE)
+    if header[:8] != DATASET_MAGIC:
+        raise ValueError(f'{path} is not a position dataset')
+    if int(np.frombuffer(header, dtype='<u8', count=1, offset=8)[0]) != RECORD_DTYPE.itemsize:
+        raise ValueError(f'{path} has records of a different size')
+
+
+class PositionDataset:
+    """Read-only view of a dataset file mapped into memory
+
+    The fields are numpy views of the mapped file, so records are only read when they are
+    used and slices or index arrays pick positions without loading the rest.
+    """
+
+    def __init__(self, path: str):
+        check_header(path)
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self.map = None
+        if count:
+            with open(path, 'rb') as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        self.current = self.records['current']
+        self.mask = self.records['mask']
+        self.ply = self.records['ply']
+        self.score = self.records['score']
+        self.flags = self.records['flags']
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def position(self, index: int) -> Position:
+        record = self.records[index]
+        return Position(int(record['current']), int(record['mask']), int(record['ply']))
+
+    def board1(self, index=slice(None)) -> np.ndarray:
+        """Bitboards of player 1 of the selected records, as `heuristic_batch` takes them"""
+        current, mask = self.current[index], self.mask[index]
+        return np.where(self.ply[index] % 2 == 0, current, current ^ mask)
+
+    def close(self):
+        """Unmaps the file, unless the caller still holds views of the records; those keep it mapped"""
+        self.current = self.mask = self.ply = self.score = self.flags = self.records = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+
+
+def write_dataset(path: str, positions: Iterable[tuple]):
+    """Writes (current, mask, ply, score, flags) tuples to a new dataset file"""
+    if os.path.exists(path):
+        os.remove(path)
+    with DatasetWriter(path) as writer:
+        for record in positions:
+            writer.write(*record)
+
+
+if __name__ == "__main__":
+    from agents.notation import iter_position_file
+
+    parser = argparse.ArgumentParser(description='Convert a move sequence file into a position dataset')
+    parser.add_argument('input', help='file with one move sequence and optionally a score per line')
+    parser.add_argument('output', help='dataset file the positions are appended to')
+    parser.add_argument('--exact', action='store_true', help='the scores are exact solver scores')
+    args = parser.parse_args()
+    with DatasetWriter(args.output) as dataset:
+        for current, mask, plies, scores in iter_position_file(args.input):
+            dataset.write_arrays(current, mask, plies, scores, EXACT if args.exact else 0)
+    print(f'{dataset.written} positions written to {args.output}')
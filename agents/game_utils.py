@@ -22,6 +22,18 @@ PLAYER2_PRINT = BoardPiecePrint('O')
 
 PlayerAction = np.int64  # The column to be played
 
+# Bitboard layout: column c uses bits 7*c (bottom row) to 7*c + 5 (top row), bit 7*c + 6 stays empty
+BOTTOM_MASKS = tuple(1 << (7 * col) for col in range(BOARD_COLS))  # lowest cell of each column
+TOP_MASKS = tuple(1 << (7 * col + INDEX_HIGHEST_ROW) for col in range(BOARD_COLS))  # highest cell of each column
+COLUMN_MASKS = tuple(0b111111 << (7 * col) for col in range(BOARD_COLS))  # all cells of each column
+BOTTOM_MASK = sum(BOTTOM_MASKS)  # lowest cell of every column
+BOARD_MASK = sum(COLUMN_MASKS)  # every cell of the board
+# All 7 bits of each column including the empty top bit, which keys built from a bitboard can use
+_C0, _C1, _C2, _C3, _C4, _C5, _C6 = (0x7F << (7 * col) for col in range(BOARD_COLS))
+# Bit index of every cell of an ndarray board in row-major order, row 0 being the lowest row
+CELL_BITS = np.array([7 * col + row for row in range(BOARD_ROWS) for col in range(BOARD_COLS)])
+_CELL_VALUES = np.left_shift(1, CELL_BITS, dtype=np.int64)
+
 
 class GameState(Enum):
     IS_WIN = 1
@@ -34,11 +46,86 @@ class SavedState:
 
 
 GenMove = Callable[
-    [np.ndarray, BoardPiece, Optional[SavedState]],  # Arguments for the generate_move function
+    [tuple, BoardPiece, Optional[SavedState]],  # Arguments for the generate_move function, boards as bitboard tuples
     tuple[PlayerAction, Optional[SavedState]]  # Return type of the generate_move function
 ]
 
 
+class Position:
+    """Mutable bitboard position, which is changed in place by `play` and restored by `undo`
+
+    Attributes
+    ----------
+    current : int
+        Bitboard of the pieces of the player whose turn it is
+    mask : int
+        Bitboard of all pieces on the board
+    moves : int
+        Number of pieces on the board
+    history : list
+        Bits of the pieces played so far, needed by `undo`
+    """
+    __slots__ = ('current', 'mask', 'moves', 'history')
+
+    def __init__(self, current: int = 0, mask: int = 0, moves: Optional[int] = None):
+        self.current = current
+        self.mask = mask
+        self.moves = int.bit_count(mask) if moves is None else moves
+        self.history = []
+
+    @classmethod
+    def from_board(cls, board: tuple, player: BoardPiece) -> 'Position':
+        """Creates the position of a board tuple in which it is player's turn"""
+        current = board[0] if player == PLAYER1 else board[1]
+        return cls(current, board[0] | board[1])
+
+    def to_board(self, player: BoardPiece) -> tuple:
+        """Returns the board tuple of the position, given the player whose turn it is"""
+        if player == PLAYER1:
+            return self.current, self.current ^ self.mask
+        return self.current ^ self.mask, self.current
+
+    def can_play(self, col: int) -> bool:
+        return not self.mask & TOP_MASKS[col]
+
+    def play(self, col: int):
+        """Drops a piece of the player whose turn it is into col, which must not be full"""
+        move = (self.mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+        self.history.append(move)
+        self.current ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def undo(self):
+        """Takes back the last piece played"""
+        self.mask ^= self.history.pop()
+        self.current ^= self.mask
+        self.moves -= 1
+
+    def winning_cells(self) -> int:
+        """Bitboard of the empty cells that complete four for the player whose turn it is"""
+        return winning_cells(self.current, self.mask)
+
+    def playable_cells(self) -> int:
+        """Bitboard of the cell each non-full column would be played into"""
+        return (self.mask + BOTTOM_MASK) & BOARD_MASK
+
+    def can_win_next(self) -> bool:
+        return bool(winning_cells(self.current, self.mask) & (self.mask + BOTTOM_MASK) & BOARD_MASK)
+
+    def is_winning_move(self, col: int) -> bool:
+        """True if playing col, which must not be full, wins for the player whose turn it is"""
+        return bool(winning_cells(self.current, self.mask) & (self.mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col])
+
+    def key(self) -> int:
+        """Unique key of the position: current + mask marks the cell above the top piece of every column"""
+        return self.current + self.mask
+
+    def canonical_key(self) -> tuple:
+        """Key that is the same for the position and its mirror image, see `canonical_key`"""
+        return canonical_key(self.current + self.mask)
+
+
 def initialize_game_state():
     """
     returns a tuple of the bitboards for player1 and player2
@@ -49,16 +136,69 @@ def initialize_game_state():
 
 
 def get_bitboard(board: np.ndarray) -> tuple:
-    board1, board2 = '', ''
-    for j in range(6, -1, -1):
-        board1 += '0'
-        board2 += '0'
-        for i in range(0, 6):
-            board1 += ['0', '1'][board[i, j] == PLAYER1]
-            board2 += ['0', '1'][board[i, j] == PLAYER2]
-    board1 = format(int(board1, 2), '049b')
-    board2 = format(int(board2, 2), '049b')
-    return int(board1, 2), int(board2, 2)
+    """Converts a (6, 7) ndarray board into the tuple of player bitboards, see `board_to_bitboard`"""
+    return board_to_bitboard(board)
+
+
+def board_to_bitboard(board: np.ndarray) -> tuple:
+    """Converts a (6, 7) ndarray board, whose row 0 is the lowest row, into the tuple of player bitboards"""
+    flat = board.reshape(BOARD_ROWS * BOARD_COLS)
+    return int((flat == PLAYER1) @ _CELL_VALUES), int((flat == PLAYER2) @ _CELL_VALUES)
+
+
+def bitboard_to_board(board: tuple) -> np.ndarray:
+    """Converts a tuple of player bitboards into a (6, 7) ndarray board, whose row 0 is the lowest row"""
+    cells = ((np.int64(board[0]) >> CELL_BITS) & 1) * PLAYER1 + ((np.int64(board[1]) >> CELL_BITS) & 1) * PLAYER2
+    return cells.reshape(BOARD_ROWS, BOARD_COLS)
+
+
+def boards_to_bitboards(boards: np.ndarray) -> tuple:
+    """Converts a stack of ndarray boards into bitboard arrays
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        Boards of shape (N, 6, 7), row 0 being the lowest row
+
+    Returns
+    -------
+    tuple
+        uint64 arrays of shape (N,) with the bitboards of player 1 and of player 2
+    """
+    flat = boards.reshape(-1, BOARD_ROWS * BOARD_COLS)
+    bits = np.zeros((2, len(flat), 64), dtype=bool)
+    bits[0][:, CELL_BITS] = flat == PLAYER1
+    bits[1][:, CELL_BITS] = flat == PLAYER2
+    packed = np.packbits(bits, axis=2, bitorder='little').view('<u8')[..., 0]
+    return packed[0].astype(np.uint64), packed[1].astype(np.uint64)
+
+
+def bitboards_to_boards(board1: np.ndarray, board2: np.ndarray) -> np.ndarray:
+    """Converts bitboard arrays into a stack of ndarray boards
+
+    Parameters
+    ----------
+    board1, board2 : np.ndarray
+        uint64 bitboards of player 1 and of player 2, of shape (N,)
+
+    Returns
+    -------
+    np.ndarray
+        Boards of shape (N, 6, 7) and dtype BoardPiece, row 0 being the lowest row
+    """
+    def cells(bitboards: np.ndarray) -> np.ndarray:
+        as_bytes = np.ascontiguousarray(bitboards, dtype='<u8').view(np.uint8).reshape(-1, 8)
+        return np.unpackbits(as_bytes, axis=1, bitorder='little')[:, CELL_BITS]
+
+    boards = cells(board1) * PLAYER1 + cells(board2) * PLAYER2
+    return boards.astype(BoardPiece).reshape(-1, BOARD_ROWS, BOARD_COLS)
+
+
+def ndarray_agent(generate_move: GenMove) -> Callable:
+    """Wraps an agent so that it takes (6, 7) ndarray boards instead of bitboard tuples"""
+    def generate_move_ndarray(board: np.ndarray, player: BoardPiece, saved_state: Optional[SavedState], *args):
+        return generate_move(board_to_bitboard(board), player, saved_state, *args)
+    return generate_move_ndarray
 
 
 def connected_four(board: tuple, player: BoardPiece):
@@ -66,6 +206,10 @@ def connected_four(board: tuple, player: BoardPiece):
         position = board[0]
     else:
         position = board[1]
+    return bitboard_connected_four(position)
+
+
+def bitboard_connected_four(position: int) -> bool:
     #Horizontal
     check = position & (position >> 7)
     if check & (check >> 14):
@@ -85,15 +229,103 @@ def connected_four(board: tuple, player: BoardPiece):
     return False
 
 
+def winning_cells(position: int, mask: int) -> int:
+    """Finds the empty cells that would complete four pieces in a row of position
+
+    Parameters
+    ----------
+    position : int
+        Bitboard of the pieces of one player
+    mask : int
+        Bitboard of all pieces on the board
+
+    Returns
+    -------
+    int
+        Bitboard of those cells, whether they can be played right now or not
+    """
+    # vertical
+    result = (position << 1) & (position << 2) & (position << 3)
+
+    # horizontal
+    left = position << 7
+    right = position >> 7
+    pair = left & (position << 14)
+    result |= pair & ((position << 21) | right)
+    pair = right & (position >> 14)
+    result |= pair & (left | (position >> 21))
+
+    # diagonal going left
+    left = position << 6
+    right = position >> 6
+    pair = left & (position << 12)
+    result |= pair & ((position << 18) | right)
+    pair = right & (position >> 12)
+    result |= pair & (left | (position >> 18))
+
+    # diagonal going right
+    left = position << 8
+    right = position >> 8
+    pair = left & (position << 16)
+    result |= pair & ((position << 24) | right)
+    pair = right & (position >> 16)
+    result |= pair & (left | (position >> 24))
+
+    return result & (BOARD_MASK ^ mask)
+
+
+def mirror_bitboard(bitboard: int) -> int:
+    """Swaps column 0 with 6, 1 with 5 and 2 with 4 of a bitboard or of a key built from bitboards
+
+    Parameters
+    ----------
+    bitboard : int
+        Bitboard using bits 0 to 48
+
+    Returns
+    -------
+    int
+        The bitboard of the mirror image of the board
+    """
+    return (
+        ((bitboard & _C0) << 42) | ((bitboard & _C1) << 28) | ((bitboard & _C2) << 14) | (bitboard & _C3)
+        | ((bitboard & _C4) >> 14) | ((bitboard & _C5) >> 28) | ((bitboard & _C6) >> 42)
+    )
+
+
+def mirror_action(action: PlayerAction) -> PlayerAction:
+    """Column of the mirror image of the board that corresponds to action"""
+    return BOARD_COLS - 1 - action
+
+
+def canonical_key(key: int) -> tuple:
+    """Picks the smaller of a key and the key of the mirror image of its board
+
+    Parameters
+    ----------
+    key : int
+        Key built from the bitboards of a board, using bits 0 to 48
+
+    Returns
+    -------
+    tuple
+        The canonical key and whether it is the mirrored one. If so, actions stored with the
+        canonical key have to be passed through `mirror_action` for the original board
+    """
+    mirrored = mirror_bitboard(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
 def apply_player_action(board: tuple, action: PlayerAction, player: BoardPiece) -> tuple:
     board1 = board[0]
     board2 = board[1]
     mask = board1 | board2
+    new_mask = mask | (mask + BOTTOM_MASKS[action])
     if player == PLAYER1:
-        new_mask = mask | (mask + (1 << (action*7)))
         board1 = board2 ^ new_mask
     else:
-        new_mask = mask | (mask + (1 << (action*7)))
         board2 = board1 ^ new_mask
     return board1, board2
 
@@ -176,21 +408,8 @@ def possible_actions(board: tuple) -> list:
     list
         A list of all columns of the board that have a BoardPiece representing NO_PLAYER
     """
-    possible_actions_list = []
     mask = board[0] | board[1]
-    column0full = 0b0000000_0000000_0000000_0000000_0000000_0000000_0100000
-    column1full = 0b0000000_0000000_0000000_0000000_0000000_0100000_0000000
-    column2full = 0b0000000_0000000_0000000_0000000_0100000_0000000_0000000
-    column3full = 0b0000000_0000000_0000000_0100000_0000000_0000000_0000000
-    column4full = 0b0000000_0000000_0100000_0000000_0000000_0000000_0000000
-    column5full = 0b0000000_0100000_0000000_0000000_0000000_0000000_0000000
-    column6full = 0b0100000_0000000_0000000_0000000_0000000_0000000_0000000
-    columncheck = [column0full, column1full, column2full, column3full, column4full, column5full, column6full]
-    for col, value in enumerate(columncheck):
-        if mask & value == 0:
-            possible_actions_list.append(col)
-
-    return possible_actions_list
+    return [col for col, top in enumerate(TOP_MASKS) if mask & top == 0]
 
 
 def possible_boards(board: tuple, player: BoardPiece) -> list:
@@ -215,14 +434,11 @@ def possible_boards(board: tuple, player: BoardPiece) -> list:
 
 
 def check_end_state(board, player):
-    board1 = board[0]
-    board2 = board[1]
-    drawnboard = 0b0111111_0111111_0111111_0111111_0111111_0111111_0111111
-    mask = board1 | board2
+    mask = board[0] | board[1]
 
     if connected_four(board, player):
         return GameState.IS_WIN
-    elif mask == drawnboard:
+    elif mask == BOARD_MASK:
         return GameState.IS_DRAW
     else:
         return GameState.STILL_PLAYING
@@ -0,0 +1,204 @@
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from agents.game_utils import PlayerAction, Position, BOTTOM_MASKS, COLUMN_MASKS, TOP_MASKS, \
+    bitboard_connected_four
+from agents.agent_minimax.batch_heuristic import connected_four_batch, popcount
+
+"""
+Move sequence notation: a game is written as the columns of its moves, as digits 1 to 7
+from the left, e.g. "4453616". Position files hold one sequence per line, optionally
+followed by a space and the score of the position.
+"""
+
+MAX_MOVES = 42
+
+_BOTTOM = np.array(BOTTOM_MASKS + (0,), dtype=np.uint64)  # index 7 plays nothing, for padding
+_COLUMN = np.array(COLUMN_MASKS + (0,), dtype=np.uint64)
+
+
+def parse_moves(moves: str) -> Position:
+    """Plays a move sequence from the empty board
+
+    Parameters
+    ----------
+    moves : str
+        Columns 1 to 7 of the moves
+
+    Returns
+    -------
+    Position
+        The position after the moves, with their history
+
+    Raises
+    ------
+    ValueError
+        If a move is not a column, goes into a full column or comes after the game was won
+    """
+    position = Position()
+    for ply, move in enumerate(moves):
+        if move not in '1234567':
+            raise ValueError(f'invalid column {move!r} at move {ply + 1}')
+        col = ord(move) - 49
+        if position.mask & TOP_MASKS[col]:
+            raise ValueError(f'column {move} is full at move {ply + 1}')
+        if ply and bitboard_connected_four(position.current ^ position.mask):
+            raise ValueError(f'game is over after move {ply}')
+        position.play(col)
+    return position
+
+
+def format_moves(actions: Iterable[PlayerAction]) -> str:
+    """Writes actions, i.e. columns 0 to 6, as a move sequence"""
+    return ''.join([chr(49 + int(action)) for action in actions])
+
+
+def position_actions(position: Position) -> list:
+    """Columns of the moves that led to the position, read from its history"""
+    return [(move.bit_length() - 1) // 7 for move in position.history]
+
+
+def parse_move_array(moves: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Plays many move sequences at once
+
+    Parameters
+    ----------
+    moves : list of str or bytes
+        Move sequences
+
+    Returns
+    -------
+    np.ndarray
+        uint64 bitboards of the pieces of the player to move
+    np.ndarray
+        uint64 bitboards of all pieces
+    np.ndarray
+        uint8 number of moves played
+
+    Raises
+    ------
+    ValueError
+        The error of `parse_moves` for the first invalid sequence, prefixed with its index
+    """
+    count = len(moves)
+    if count and max(map(len, moves)) > MAX_MOVES:
+        index = next(i for i, sequence in enumerate(moves) if len(sequence) > MAX_MOVES)
+        raise ValueError(f'sequence {index}: more than {MAX_MOVES} moves')
+    # Fixed width bytes are zero padded, which becomes the column 7 that plays nothing
+    digits = np.array(moves, dtype=f'S{MAX_MOVES}').view(np.uint8).reshape(count, MAX_MOVES)
+    plies = np.count_nonzero(digits, axis=1).astype(np.uint8)
+    columns = digits - np.uint8(49)
+    columns[digits == 0] = 7
+    invalid = columns > 7
+    invalid |= (columns == 7) & (digits != 0)
+    columns[invalid] = 7
+    invalid = invalid.any(axis=1)
+
+    # A move into a full column carries into the empty top bit, which the column mask removes,
+    # so such a move plays nothing and is found by counting the pieces afterwards
+    board1 = np.zeros(count, dtype=np.uint64)
+    mask = np.zeros(count, dtype=np.uint64)
+    by_ply = np.ascontiguousarray(columns.T)
+    for ply in range(int(plies.max()) if count else 0):
+        cols = by_ply[ply]
+        move = (mask + _BOTTOM[cols]) & _COLUMN[cols]
+        mask |= move
+        if ply % 2 == 0:
+            board1 |= move
+    invalid |= popcount(mask) != plies
+
+    # Connected fours stay on the board, so the game ended early exactly if there was one
+    # before the last move. The last piece is the top one of the column played last
+    last_cols = columns[np.arange(count), np.maximum(plies.astype(np.int64) - 1, 0)]
+    last = (((mask & _COLUMN[last_cols]) + _BOTTOM[last_cols]) >> np.uint64(1)) & _COLUMN[last_cols]
+    player1_moved_last = (plies % 2) == 1
+    last_mover = np.where(player1_moved_last, board1, board1 ^ mask)
+    invalid |= (plies > 0) & (connected_four_batch(last_mover ^ last) | connected_four_batch(last_mover ^ mask))
+
+    if invalid.any():
+        index = int(np.argmax(invalid))
+        sequence = moves[index]
+        try:
+            parse_moves(sequence.decode() if isinstance(sequence, bytes) else sequence)
+        except ValueError as error:
+            raise ValueError(f'sequence {index}: {error}') from None
+    current = np.where(player1_moved_last, board1 ^ mask, board1)
+    return current, mask, plies
+
+
+def iter_position_file(
+        path: str, chunk_size: int = 1 << 16
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """Reads a position file in chunks of packed arrays
+
+    Parameters
+    ----------
+    path : str
+        File with one move sequence per line, optionally followed by a score
+    chunk_size : int
+        Lines per chunk
+
+    Yields
+    ------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]
+        The arrays of `parse_move_array` for the lines of a chunk and their int16 scores, or
+        None if the lines have no scores
+
+    Raises
+    ------
+    ValueError
+        For the first invalid line, or if only some lines have a score
+    """
+    with open(path, 'rb') as file:
+        first_line = 1
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                return
+            text = b''.join(lines)
+            widths = _tokens_per_line(text, len(lines))
+            wrong = (widths != widths[0]) | (widths == 0) | (widths > 2)
+            if wrong.any():
+                raise ValueError(
+                    f'{path}, line {first_line + int(np.argmax(wrong))}: expected a move sequence and, '
+                    f'like on line {first_line}, {"a" if widths[0] == 2 else "no"} score'
+                )
+            tokens = text.split()
+            try:
+                current, mask, plies = parse_move_array(tokens[::2] if widths[0] == 2 else tokens)
+            except ValueError as error:
+                index, message = str(error).split(': ', 1)
+                raise ValueError(f'{path}, line {first_line + int(index.split()[1])}: {message}') from None
+            scores = np.array(list(map(int, tokens[1::2])), dtype=np.int16) if widths[0] == 2 else None
+            yield current, mask, plies, scores
+            first_line += len(lines)
+
+
+def load_position_file(path: str, chunk_size: int = 1 << 16) -> Tuple[np.ndarray, np.ndarray, np.ndarray,
+                                                                      Optional[np.ndarray]]:
+    """Reads a whole position file into packed arrays, see `iter_position_file`"""
+    chunks = list(iter_position_file(path, chunk_size))
+    if not chunks:
+        empty = np.zeros(0, dtype=np.uint64)
+        return empty, empty.copy(), np.zeros(0, dtype=np.uint8), None
+    has_scores = {chunk[3] is not None for chunk in chunks}
+    if len(has_scores) > 1:
+        raise ValueError(f'{path}: either all or no lines need a score')
+    scores = np.concatenate([chunk[3] for chunk in chunks]) if has_scores == {True} else None
+    return (
+        np.concatenate([chunk[0] for chunk in chunks]), np.concatenate([chunk[1] for chunk in chunks]),
+        np.concatenate([chunk[2] for chunk in chunks]), scores
+    )
+
+
+def _tokens_per_line(text: bytes, lines: int) -> np.ndarray:
+    """Number of whitespace separated tokens on every line of text"""
+    buffer = np.frombuffer(text, dtype=np.uint8)
+    newline = buffer == 10
+    blank = newline | (buffer == 32) | (buffer == 9) | (buffer == 13)
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    line = np.cumsum(newline) - newline
+    return np.bincount(line[starts], minlength=lines)
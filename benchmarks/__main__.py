@@ -0,0 +1,48 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks.bench_batch_playout import bench_batch_playout
+from benchmarks.bench_heuristic_batch import bench_heuristic_batch
+from benchmarks.bench_mcts import bench_mcts
+from benchmarks.bench_notation import bench_notation
+from benchmarks.bench_primitives import bench_primitives
+from benchmarks.bench_search import bench_search
+from benchmarks.perft import bench_perft
+
+"""
+Runs all benchmarks and writes one JSON object per line: first the environment, then the results.
+
+    python -m benchmarks [--quick] [--output results.jsonl]
+"""
+
+
+def run_benchmarks(quick: bool = False) -> list:
+    results = [{
+        'benchmark': 'environment',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }]
+    results += bench_perft(5 if quick else 7)
+    results += bench_primitives(2_000 if quick else 20_000)
+    results += bench_search(3 if quick else 6)
+    results.append(bench_heuristic_batch(10_000 if quick else 100_000))
+    results.append(bench_mcts(2_000 if quick else 20_000))
+    results.append(bench_batch_playout(20_000 if quick else 1_000_000))
+    results.append(bench_notation(20_000 if quick else 300_000))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='smaller workloads')
+    parser.add_argument('--output', default=None, help='JSONL file to write instead of stdout')
+    args = parser.parse_args()
+    output = open(args.output, 'w') if args.output else sys.stdout
+    for result in run_benchmarks(args.quick):
+        output.write(json.dumps(result) + '\n')
+    if args.output:
+        output.close()
@@ -0,0 +1,25 @@
+import json
+import time
+
+from agents.agent_random.batch_playout import random_games
+
+"""
+Throughput of the batch random-playout engine in finished games.
+"""
+
+
+def bench_batch_playout(games: int = 1_000_000, batch_size: int = 65_536) -> dict:
+    t0 = time.perf_counter()
+    played = sum(len(lengths) for _, lengths, _ in random_games(games, batch_size, seed=0))
+    seconds = time.perf_counter() - t0
+    return {
+        'benchmark': 'batch_playout',
+        'games': played,
+        'batch_size': batch_size,
+        'games_per_s': played / seconds,
+        'games_per_min': 60 * played / seconds,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(bench_batch_playout()))
@@ -0,0 +1,57 @@
+import json
+import random
+import time
+
+import numpy as np
+
+from agents.game_utils import initialize_game_state, apply_player_action, possible_actions, check_end_state, \
+    GameState, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import heuristic
+from agents.agent_minimax.batch_heuristic import heuristic_batch
+
+"""
+Throughput of the scalar heuristic loop against heuristic_batch on the same random boards.
+"""
+
+
+def random_boards(count: int, seed: int = 0) -> list:
+    """Boards of random games stopped after a random number of moves"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = initialize_game_state()
+        player = PLAYER1
+        for _ in range(rng.randrange(42)):
+            board = apply_player_action(board, rng.choice(possible_actions(board)), player)
+            if check_end_state(board, player) != GameState.STILL_PLAYING:
+                break
+            player = PLAYER2 if player == PLAYER1 else PLAYER1
+        boards.append(board)
+    return boards
+
+
+def bench_heuristic_batch(count: int = 100_000) -> dict:
+    boards = random_boards(count)
+    board1 = np.array([board[0] for board in boards], dtype=np.uint64)
+    mask = np.array([board[0] | board[1] for board in boards], dtype=np.uint64)
+
+    t0 = time.perf_counter()
+    scalar = [heuristic(board) for board in boards]
+    scalar_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = heuristic_batch(board1, mask)
+    batch_time = time.perf_counter() - t0
+
+    assert np.array_equal(batch, scalar)
+    return {
+        'benchmark': 'heuristic_batch',
+        'positions': count,
+        'scalar_positions_per_s': count / scalar_time,
+        'batch_positions_per_s': count / batch_time,
+        'speedup': scalar_time / batch_time,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(bench_heuristic_batch()))
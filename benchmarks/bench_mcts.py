@@ -0,0 +1,33 @@
+import json
+import random
+import time
+
+from agents.game_utils import initialize_game_state, PLAYER1
+from agents.agent_mcts.mcts import generate_move_mcts, random_playout
+
+"""
+Random playout throughput, on its own and inside the tree search.
+"""
+
+
+def bench_mcts(playouts: int = 20_000) -> dict:
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for _ in range(playouts):
+        random_playout(0, 0, rng)
+    playout_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    _, saved_state = generate_move_mcts(initialize_game_state(), PLAYER1, None, time_limit=None,
+                                        iterations=playouts, seed=0)
+    search_time = time.perf_counter() - t0
+    return {
+        'benchmark': 'mcts',
+        'playouts': playouts,
+        'playouts_per_s': playouts / playout_time,
+        'search_playouts_per_s': saved_state.iterations / search_time,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(bench_mcts()))
@@ -0,0 +1,39 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from agents.agent_random.batch_playout import play_random_batch
+from agents.notation import format_moves, load_position_file
+
+"""
+Load time of a scored position file of random game prefixes.
+"""
+
+
+def bench_notation(positions: int = 300_000) -> dict:
+    rng = np.random.default_rng(0)
+    moves, lengths, _ = play_random_batch(positions, rng)
+    lines = [
+        f'{format_moves(game[:rng.integers(1, length + 1)])} {rng.integers(-18, 19)}\n'
+        for game, length in zip(moves, lengths)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'positions.txt')
+        with open(path, 'w') as file:
+            file.writelines(lines)
+        t0 = time.perf_counter()
+        load_position_file(path)
+        seconds = time.perf_counter() - t0
+    return {
+        'benchmark': 'position_file',
+        'positions': positions,
+        'seconds': seconds,
+        'positions_per_s': positions / seconds,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(bench_notation()))
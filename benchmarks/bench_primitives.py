@@ -0,0 +1,52 @@
+import json
+import timeit
+
+from agents.game_utils import Position, apply_player_action, possible_actions, possible_boards, connected_four, \
+    check_end_state, winning_cells, board_to_bitboard, bitboard_to_board, PLAYER1
+from agents.agent_minimax.minimax import heuristic
+from benchmarks.bench_search import POSITIONS, play_actions
+
+"""
+Time per call of the bitboard primitives on the fixed positions of bench_search.
+"""
+
+
+def bench_primitives(number: int = 20_000) -> list:
+    results = []
+    for name, actions in POSITIONS.items():
+        board, player = play_actions(actions)
+        position = Position.from_board(board, player)
+        action = possible_actions(board)[0]
+        array_board = bitboard_to_board(board)
+
+        def play_undo():
+            position.play(action)
+            position.undo()
+
+        primitives = {
+            'apply_player_action': lambda: apply_player_action(board, action, player),
+            'possible_actions': lambda: possible_actions(board),
+            'possible_boards': lambda: possible_boards(board, player),
+            'connected_four': lambda: connected_four(board, PLAYER1),
+            'check_end_state': lambda: check_end_state(board, player),
+            'heuristic': lambda: heuristic(board),
+            'position_play_undo': play_undo,
+            'winning_cells': lambda: winning_cells(position.current, position.mask),
+            'board_to_bitboard': lambda: board_to_bitboard(array_board),
+            'bitboard_to_board': lambda: bitboard_to_board(board),
+        }
+        for primitive, function in primitives.items():
+            seconds = min(timeit.repeat(function, number=number, repeat=3))
+            results.append({
+                'benchmark': 'primitive',
+                'primitive': primitive,
+                'position': name,
+                'ns_per_call': seconds / number * 1e9,
+                'calls_per_s': number / seconds,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    for result in bench_primitives():
+        print(json.dumps(result))
@@ -0,0 +1,71 @@
+import json
+import time
+
+from agents.game_utils import Position, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import generate_move_minimax
+from agents.agent_minimax.solver import solve_move
+from agents.agent_minimax.search_stats import SearchStats
+
+"""
+Time to depth and nodes per second of generate_move_minimax on fixed positions, with the
+static and the dynamic move ordering and with and without the incremental evaluation.
+"""
+
+# Actions played from the empty board, none of the positions can be won with the next move
+POSITIONS = {
+    'early': (4, 2, 1, 0),
+    'mid': (3, 1, 3, 2, 6, 6, 2, 1, 2, 3, 6, 3),
+    'late': (3, 5, 6, 4, 0, 3, 3, 0, 4, 2, 2, 3, 3, 1, 5, 4, 1, 6, 6, 3, 4, 1, 2, 0),
+}
+
+# Pairs (move_ordering, incremental_eval) every position and depth is searched with
+SEARCH_MODES = ((False, False), (True, False), (True, True))
+
+
+def play_actions(actions: tuple) -> tuple:
+    """Returns the board after the actions and the player whose turn it is"""
+    position = Position()
+    for action in actions:
+        position.play(action)
+    player = PLAYER1 if position.moves % 2 == 0 else PLAYER2
+    return position.to_board(player), player
+
+
+def bench_search(max_depth: int = 6) -> list:
+    results = []
+    for name, actions in POSITIONS.items():
+        board, player = play_actions(actions)
+        for depth in range(1, max_depth + 1):
+            for move_ordering, incremental_eval in SEARCH_MODES:
+                t0 = time.perf_counter()
+                _, saved_state = generate_move_minimax(
+                    board, player, None, depth=depth, solver_threshold=0, collect_stats=True,
+                    move_ordering=move_ordering, incremental_eval=incremental_eval
+                )
+                elapsed = time.perf_counter() - t0
+                stats = saved_state.stats
+                results.append({
+                    'benchmark': 'search',
+                    'position': name,
+                    'depth': depth,
+                    'move_ordering': move_ordering,
+                    'incremental_eval': incremental_eval,
+                    'seconds': elapsed,
+                    'nodes_per_s': stats.nodes / elapsed,
+                    **stats.as_dict(),
+                })
+    board, player = play_actions(POSITIONS['late'])
+    stats = SearchStats()
+    t0 = time.perf_counter()
+    _, score = solve_move(Position.from_board(board, player), stats=stats)
+    elapsed = time.perf_counter() - t0
+    results.append({
+        'benchmark': 'solve', 'position': 'late', 'score': score, 'seconds': elapsed,
+        'nodes': stats.nodes, 'nodes_per_s': stats.nodes / elapsed,
+    })
+    return results
+
+
+if __name__ == "__main__":
+    for result in bench_search():
+        print(json.dumps(result))
@@ -0,0 +1,74 @@
+import json
+import sys
+import time
+
+from agents.game_utils import BoardPiece, Position, PLAYER1, PLAYER2, initialize_game_state, apply_player_action, \
+    possible_actions, connected_four
+
+"""
+Perft: the number of move sequences of a given length from the empty board. Sequences in which a
+player connects four before the last move are not counted, like checkmates in chess perft. Both
+the tuple functions and Position have to reproduce the reference counts.
+"""
+
+# PERFT_REFERENCE[d] is the number of leaves at depth d from the empty board
+PERFT_REFERENCE = (1, 7, 49, 343, 2401, 16807, 117649, 823536, 5673234)
+
+
+def perft(board: tuple, player: BoardPiece, depth: int) -> int:
+    """Counts the leaves at depth below board using apply_player_action and possible_actions"""
+    if depth == 0:
+        return 1
+    other = PLAYER2 if player == PLAYER1 else PLAYER1
+    nodes = 0
+    for action in possible_actions(board):
+        if depth == 1:
+            nodes += 1
+            continue
+        child = apply_player_action(board, action, player)
+        if not connected_four(child, player):
+            nodes += perft(child, other, depth - 1)
+    return nodes
+
+
+def perft_position(position: Position, depth: int) -> int:
+    """Counts the leaves at depth below position using play and undo"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for col in range(7):
+        if not position.can_play(col):
+            continue
+        if depth == 1:
+            nodes += 1
+        elif not position.is_winning_move(col):
+            position.play(col)
+            nodes += perft_position(position, depth - 1)
+            position.undo()
+    return nodes
+
+
+def bench_perft(max_depth: int = 7) -> list:
+    results = []
+    for name, count in (
+            ('perft_tuple', lambda d: perft(initialize_game_state(), PLAYER1, d)),
+            ('perft_position', lambda d: perft_position(Position(), d)),
+    ):
+        for depth in range(1, max_depth + 1):
+            t0 = time.perf_counter()
+            nodes = count(depth)
+            elapsed = time.perf_counter() - t0
+            results.append({
+                'benchmark': name,
+                'depth': depth,
+                'nodes': nodes,
+                'reference': PERFT_REFERENCE[depth] if depth < len(PERFT_REFERENCE) else None,
+                'seconds': elapsed,
+                'nodes_per_s': nodes / elapsed,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    for result in bench_perft(int(sys.argv[1]) if len(sys.argv) > 1 else 7):
+        print(json.dumps(result))
@@ -0,0 +1,168 @@
+import argparse
+import sys
+import threading
+import time
+from typing import Optional, TextIO
+
+from agents.game_utils import PLAYER1, PLAYER2, Position, bitboard_connected_four
+from agents.notation import parse_moves
+from agents.agent_minimax.minimax import CENTER_FIRST_ORDER, MinimaxSavedState, StopDeadline, generate_move_minimax
+from agents.agent_minimax.search_stats import SearchStats
+
+"""
+Long-running minimax engine reading commands from stdin and answering on stdout, one per line.
+
+Moves are written as column digits 1 to 7, a game as the digits of its moves, e.g. 4453
+(see `agents.notation`).
+
+    position [<moves>]      set the position reached by the moves from the empty board
+    go depth <n>            search to depth n
+    go movetime <ms>        search for ms milliseconds
+    go                      search to the default depth
+    stop                    end the running search, which then answers at once
+    isready                 answered with readyok once earlier commands are done
+    newgame                 start a new game, keeping the transposition table
+    quit
+
+A search answers with one line per completed depth and the chosen move:
+
+    info depth <d> time <ms> nodes <n>
+    bestmove <column>
+
+Errors are answered with `info string error ...`. A search that fails still answers with a
+bestmove, the first legal column from the center outwards. The transposition table of all
+searches is kept, so later games and positions start with warm caches.
+"""
+
+DEFAULT_DEPTH = 8
+MAX_DEPTH = 42
+
+
+class Engine:
+    """State of the engine between commands
+
+    Parameters
+    ----------
+    output : TextIO
+        Stream the answers are written to
+    table_size : int
+        Entries of the transposition table
+    book_path : str, optional
+        Opening book passed to `generate_move_minimax`
+    """
+
+    def __init__(self, output: TextIO, table_size: int = 1_000_000, book_path: Optional[str] = None):
+        self.output = output
+        self.book_path = book_path
+        self.saved_state = MinimaxSavedState(table_size)
+        self.position = Position()
+        self.search = None
+        self.deadline = None
+        self.lock = threading.Lock()
+
+    def send(self, line: str):
+        with self.lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def handle(self, line: str) -> bool:
+        """Executes one command, returning False when the engine is to quit"""
+        words = line.split()
+        if not words:
+            return True
+        command, arguments = words[0], words[1:]
+        if command == 'quit':
+            self.stop()
+            return False
+        if command == 'stop':
+            self.stop()
+        elif command == 'isready':
+            self.wait()
+            self.send('readyok')
+        elif command == 'newgame':
+            self.stop()
+            self.position = Position()
+        elif command == 'position':
+            self.stop()
+            self.set_position(arguments[0] if arguments else '')
+        elif command == 'go':
+            self.stop()
+            self.go(arguments)
+        else:
+            self.send(f'info string error unknown command {command}')
+        return True
+
+    def set_position(self, moves: str):
+        try:
+            self.position = parse_moves(moves)
+        except ValueError as error:
+            self.send(f'info string error {error}')
+
+    def go(self, arguments: list):
+        position = self.position
+        if position.moves == 42 or bitboard_connected_four(position.current ^ position.mask):
+            self.send('info string error game is over')
+            return
+        depth, end = DEFAULT_DEPTH, None
+        try:
+            if arguments[:1] == ['depth']:
+                depth = int(arguments[1])
+                if not 0 <= depth <= MAX_DEPTH:
+                    raise ValueError
+            elif arguments[:1] == ['movetime']:
+                movetime = int(arguments[1])
+                if movetime < 0:
+                    raise ValueError
+                depth, end = MAX_DEPTH, time.perf_counter() + movetime / 1000
+            elif arguments:
+                raise ValueError
+        except (IndexError, ValueError):
+            self.send(f'info string error invalid go {" ".join(arguments)}')
+            return
+        self.deadline = StopDeadline(end)
+        self.search = threading.Thread(target=self.run, args=(position, depth, self.deadline), daemon=True)
+        self.search.start()
+
+    def run(self, position: Position, depth: int, deadline: StopDeadline):
+        player = PLAYER1 if position.moves % 2 == 0 else PLAYER2
+        try:
+            action, _ = generate_move_minimax(
+                position.to_board(player), player, self.saved_state, depth, book_path=self.book_path,
+                stats_callback=self.send_info, deadline=deadline
+            )
+        except Exception as error:
+            # The GUI waits for a bestmove, so a failed search still answers with a legal move
+            self.send(f'info string error search failed: {error!r}')
+            action = next(col for col in CENTER_FIRST_ORDER if position.can_play(col))
+        self.send(f'bestmove {action + 1}')
+
+    def send_info(self, stats: SearchStats):
+        for depth, seconds, nodes in stats.depth_times:
+            self.send(f'info depth {depth} time {round(seconds * 1000)} nodes {nodes}')
+
+    def stop(self):
+        if self.search is not None:
+            self.deadline.stop = True
+            self.wait()
+
+    def wait(self):
+        if self.search is not None:
+            self.search.join()
+            self.search = None
+
+
+def run_engine(input_stream: TextIO, output: TextIO, table_size: int = 1_000_000, book_path: Optional[str] = None):
+    """Answers the commands of input_stream on output until quit or the end of the input"""
+    engine = Engine(output, table_size, book_path)
+    for line in input_stream:
+        if not engine.handle(line):
+            return
+    engine.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Minimax engine speaking a line protocol on stdin and stdout')
+    parser.add_argument('--table-size', type=int, default=1_000_000)
+    parser.add_argument('--book', default=None, help='opening book file')
+    args = parser.parse_args()
+    run_engine(sys.stdin, sys.stdout, args.table_size, args.book)
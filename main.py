@@ -2,7 +2,7 @@ from typing import Callable
 from agents.game_utils import GenMove
 from agents.agent_human_user import user_move
 from agents.agent_random import generate_move
-from agents.agent_minimax import generate_move_minimax as gen_minimax
+from agents.agent_minimax.ponder import generate_move_pondering, stop_pondering
 
 
 def human_vs_agent(
@@ -57,6 +57,10 @@ def human_vs_agent(
                     playing = False
                     break
 
+        # Searching the replies of a finished game would only slow down the next one
+        for state in saved_state.values():
+            stop_pondering(state)
+
 
 if __name__ == "__main__":
-    human_vs_agent(gen_minimax)
+    human_vs_agent(generate_move_pondering)
@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from agents.game_utils import BoardPiece, SavedState, PlayerAction, PLAYER1, PLAYER2, GameState, \
+    initialize_game_state, apply_player_action, check_end_state, possible_actions
+from agents.agent_human_user.human_user import handle_illegal_moves
+from agents.agent_minimax.minimax import generate_move_minimax, search_root, map_board_to_player_one
+from agents.agent_minimax.transposition_table import TranspositionTable
+
+"""
+Asyncio server hosting many games against the minimax agent over TCP, one game at a time per connection.
+
+Every command is answered with exactly one line, columns are 0 to 6:
+
+    new first | new second   start a game in which the client moves first or second;
+                             answered with `ok`, or with the engine's first move
+    move <column>            the client's move, answered with the engine's move
+    quit                     close the connection
+
+    ok
+    move <column>                  move of the engine
+    move <column> result loss|draw move of the engine that ended the game
+    result win|draw                the client's move ended the game
+    error <message>                the command was rejected and the game is unchanged
+
+Searches run in a bounded process pool. Every session keeps its own SavedState, which travels
+with its searches. A move is due move_time seconds after it was requested. At most max_pending
+searches are queued or running; a session waiting for a slot reads no further commands, which
+passes the load back to its client. The search gets the time left once it has a slot. If no
+result arrives in time, a one ply search in the server answers instead.
+"""
+
+ILLEGAL_MOVE_MESSAGES = {
+    TypeError: 'not the right format, try an integer',
+    IndexError: 'column is not in the range of possible columns (0 - 6)',
+    ValueError: 'column is full',
+}
+
+
+def search_move(
+        board: tuple, player: BoardPiece, saved_state: Optional[SavedState], depth: int, time_limit: float,
+        table_size: int
+) -> tuple:
+    """Engine move of a session, run in a worker process"""
+    return generate_move_minimax(board, player, saved_state, depth, table_size=table_size, time_limit=time_limit)
+
+
+class Session:
+    """A connection and the game it is playing"""
+
+    def __init__(self):
+        self.board = None
+        self.engine_player = None
+        self.saved_state = None
+
+
+class GameServer:
+    """Game sessions sharing a pool of search processes
+
+    Parameters
+    ----------
+    processes : int
+        Number of search processes
+    max_pending : int, optional
+        Searches that may be queued or running at once, by default 4 per process
+    move_time : float
+        Seconds from a client's move until the engine's answer is due
+    depth : int
+        Deepest search of the engine
+    table_size : int
+        Transposition table entries of each session, which are sent along with its searches
+    """
+
+    def __init__(
+            self, processes: int = 2, max_pending: Optional[int] = None, move_time: float = 1.0, depth: int = 8,
+            table_size: int = 20_000
+    ):
+        self.pool = ProcessPoolExecutor(processes)
+        self.pending = asyncio.Semaphore(4 * processes if max_pending is None else max_pending)
+        self.move_time = move_time
+        self.depth = depth
+        self.table_size = table_size
+        self.sessions = 0
+        self.timeouts = 0
+        self.server = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """Starts listening and returns the port"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session()
+        self.sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode().split()
+                if words == ['quit']:
+                    break
+                writer.write((await self.handle(session, words) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def handle(self, session: Session, words: list) -> str:
+        """Answer to one command of a session"""
+        if words[:1] == ['new'] and words[1:] in (['first'], ['second']):
+            session.board = initialize_game_state()
+            session.engine_player = PLAYER2 if words[1] == 'first' else PLAYER1
+            session.saved_state = None
+            if session.engine_player == PLAYER2:
+                return 'ok'
+            return await self.engine_turn(session)
+        if words[:1] == ['move'] and len(words) == 2:
+            if session.board is None:
+                return 'error no game, start one with new'
+            try:
+                handle_illegal_moves(session.board, words[1])
+            except (TypeError, IndexError, ValueError) as error:
+                return 'error ' + ILLEGAL_MOVE_MESSAGES[type(error)]
+            client_player = PLAYER1 if session.engine_player == PLAYER2 else PLAYER2
+            session.board = apply_player_action(session.board, PlayerAction(words[1]), client_player)
+            end_state = check_end_state(session.board, client_player)
+            if end_state != GameState.STILL_PLAYING:
+                session.board = None
+                return 'result win' if end_state == GameState.IS_WIN else 'result draw'
+            return await self.engine_turn(session)
+        return 'error unknown command ' + ' '.join(words)
+
+    async def engine_turn(self, session: Session) -> str:
+        action = await self.engine_move(session)
+        session.board = apply_player_action(session.board, action, session.engine_player)
+        end_state = check_end_state(session.board, session.engine_player)
+        if end_state == GameState.STILL_PLAYING:
+            return f'move {action}'
+        session.board = None
+        return f'move {action} result ' + ('loss' if end_state == GameState.IS_WIN else 'draw')
+
+    async def engine_move(self, session: Session) -> PlayerAction:
+        loop = asyncio.get_running_loop()
+        due = loop.time() + self.move_time
+        try:
+            await asyncio.wait_for(self.pending.acquire(), self.move_time)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return self.fallback_move(session)
+        # Leave the worker a margin to return its result before the move is due
+        time_limit = 0.8 * max(due - loop.time(), 0.0)
+        try:
+            future = self.pool.submit(
+                search_move, session.board, session.engine_player, session.saved_state, self.depth, time_limit,
+                self.table_size
+            )
+        except Exception:
+            # Without a future there is no done callback to free the slot
+            self.pending.release()
+            raise
+        # The slot is only freed once the worker is done, even if the move was answered without it
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.pending.release))
+        try:
+            action, session.saved_state = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), max(due - loop.time(), 0.0)
+            )
+            return action
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            return self.fallback_move(session)
+
+    @staticmethod
+    def fallback_move(session: Session) -> PlayerAction:
+        board = session.board
+        if session.engine_player == PLAYER2:
+            board = map_board_to_player_one(board)
+        action, _ = search_root(board, 1, TranspositionTable(1_000))
+        return action
+
+
+async def play_client(host: str, port: int, games: int, rng: random.Random, latencies: list) -> dict:
+    """Plays games of random moves against the server, appending the latency of every engine move"""
+    reader, writer = await asyncio.open_connection(host, port)
+    results = {'win': 0, 'loss': 0, 'draw': 0, 'error': 0}
+
+    async def send(command: str) -> list:
+        t0 = time.perf_counter()
+        writer.write((command + '\n').encode())
+        await writer.drain()
+        words = (await reader.readline()).decode().split()
+        if words[:1] == ['move']:
+            latencies.append(time.perf_counter() - t0)
+        return words
+
+    for game in range(games):
+        client_player = PLAYER1 if game % 2 == 0 else PLAYER2
+        engine_player = PLAYER2 if client_player == PLAYER1 else PLAYER1
+        board = initialize_game_state()
+        words = await send('new first' if client_player == PLAYER1 else 'new second')
+        while True:
+            if words[:1] == ['move']:
+                board = apply_player_action(board, PlayerAction(words[1]), engine_player)
+            if 'result' in words:
+                results[words[-1]] += 1
+                break
+            if words[:1] == ['error']:
+                results['error'] += 1
+                break
+            action = rng.choice(possible_actions(board))
+            board = apply_player_action(board, action, client_player)
+            words = await send(f'move {action}')
+    writer.write(b'quit\n')
+    await writer.drain()
+    writer.close()
+    return results
+
+
+async def run_load(host: str, port: int, clients: int, games: int, seed: int = 0) -> dict:
+    """Plays games from many concurrent clients and measures the engine moves
+
+    Parameters
+    ----------
+    host, port
+        Address of the server
+    clients : int
+        Number of concurrent connections
+    games : int
+        Games played by every client, alternately moving first and second
+    seed : int
+        Seed of the random moves of the clients
+
+    Returns
+    -------
+    dict
+        Results of the games, engine moves per second and latency percentiles in milliseconds
+    """
+    latencies = []
+    t0 = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        play_client(host, port, games, random.Random(seed + client), latencies) for client in range(clients)
+    ))
+    seconds = time.perf_counter() - t0
+    summary = {'win': 0, 'loss': 0, 'draw': 0, 'error': 0}
+    for outcome in outcomes:
+        for result, count in outcome.items():
+            summary[result] += count
+    latencies.sort()
+    return {
+        'clients': clients,
+        'games': clients * games,
+        **summary,
+        'moves': len(latencies),
+        'moves_per_s': len(latencies) / seconds,
+        'p50_ms': 1000 * latencies[len(latencies) // 2],
+        'p99_ms': 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+    }
+
+
+async def serve(host: str, port: int, **options):
+    server = GameServer(**options)
+    port = await server.start(host, port)
+    print(f'listening on {host}:{port}', flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+async def serve_and_load(clients: int, games: int, seed: int, **options) -> dict:
+    """Runs a server and the load generator against it in the same event loop"""
+    server = GameServer(**options)
+    port = await server.start()
+    try:
+        result = await run_load('127.0.0.1', port, clients, games, seed)
+    finally:
+        await server.close()
+    return {**result, 'fallback_moves': server.timeouts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Game server for the minimax agent and its load generator')
+    parser.add_argument('mode', choices=('serve', 'load', 'bench'),
+                        help='serve games, load a running server, or run both and print the measurements')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4444)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--max-pending', type=int, default=None)
+    parser.add_argument('--move-time', type=float, default=1.0, help='seconds until an engine move is due')
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--games', type=int, default=2, help='games per client')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    options = dict(processes=args.processes, max_pending=args.max_pending, move_time=args.move_time, depth=args.depth)
+    if args.mode == 'serve':
+        asyncio.run(serve(args.host, args.port, **options))
+    elif args.mode == 'load':
+        print(json.dumps(asyncio.run(run_load(args.host, args.port, args.clients, args.games, args.seed))))
+    else:
+        print(json.dumps(asyncio.run(serve_and_load(args.clients, args.games, args.seed, **options))))
@@ -0,0 +1,27 @@
+import numpy as np
+
+from agents.agent_minimax.minimax import heuristic, count_three, count_two, count_one
+from agents.agent_minimax.batch_heuristic import heuristic_batch, three_bits_batch, two_bits_batch, \
+    one_bits_batch, popcount
+from agents.game_utils import PLAYER1
+from benchmarks.bench_heuristic_batch import random_boards
+
+
+def test_heuristic_batch_matches_heuristic():
+    boards = random_boards(2000, seed=1)
+    board1 = np.array([board[0] for board in boards], dtype=np.uint64)
+    mask = np.array([board[0] | board[1] for board in boards], dtype=np.uint64)
+    assert heuristic_batch(board1, mask).tolist() == [heuristic(board) for board in boards]
+
+
+def test_count_bits_batch_matches_scalar():
+    boards = random_boards(200, seed=2)
+    board1 = np.array([board[0] for board in boards], dtype=np.uint64)
+    invboard = ~np.array([board[0] | board[1] for board in boards], dtype=np.uint64)
+    for batch, scalar in ((three_bits_batch, count_three), (two_bits_batch, count_two), (one_bits_batch, count_one)):
+        assert batch(board1, invboard).tolist() == [scalar(board, PLAYER1) for board in boards]
+
+
+def test_popcount():
+    values = np.array([0, 1, 0b1011, 2 ** 64 - 1], dtype=np.uint64)
+    assert popcount(values).tolist() == [0, 1, 3, 64]
@@ -0,0 +1,27 @@
+import numpy as np
+
+from agents.game_utils import Position, bitboard_connected_four
+from agents.agent_random.batch_playout import play_random_batch, random_games
+
+
+def test_batch_games_replay():
+    moves, lengths, winners = play_random_batch(2000, np.random.default_rng(0))
+    for game, length, winner in zip(moves, lengths, winners):
+        position = Position()
+        for ply, col in enumerate(game[:length]):
+            assert position.can_play(int(col))
+            assert not bitboard_connected_four(position.current ^ position.mask)
+            won = position.is_winning_move(int(col))
+            position.play(int(col))
+            assert won == (ply == length - 1 and winner != 0)
+        assert (game[length:] == -1).all()
+        assert winner != 0 or length == 42
+        if winner:
+            assert winner == 2 - length % 2
+
+
+def test_random_games_count_and_seed():
+    batches = list(random_games(1000, batch_size=300, seed=3))
+    assert [len(lengths) for _, lengths, _ in batches] == [300, 300, 300, 100]
+    again = list(random_games(1000, batch_size=300, seed=3))
+    assert all(np.array_equal(a[0], b[0]) for a, b in zip(batches, again))
@@ -0,0 +1,21 @@
+from agents.game_utils import Position, initialize_game_state, PLAYER1
+from benchmarks.perft import perft, perft_position, PERFT_REFERENCE
+from benchmarks.bench_search import POSITIONS, play_actions
+from benchmarks.__main__ import run_benchmarks
+
+
+def test_perft_reference():
+    for depth in range(6):
+        assert perft(initialize_game_state(), PLAYER1, depth) == PERFT_REFERENCE[depth]
+        assert perft_position(Position(), depth) == PERFT_REFERENCE[depth]
+
+
+def test_benchmark_positions_are_open():
+    for actions in POSITIONS.values():
+        board, player = play_actions(actions)
+        assert not Position.from_board(board, player).can_win_next()
+
+
+def test_run_benchmarks_quick():
+    results = run_benchmarks(quick=True)
+    assert {result['benchmark'] for result in results} >= {'environment', 'perft_tuple', 'primitive', 'search', 'mcts'}
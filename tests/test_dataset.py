@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from agents.game_utils import Position
+from agents.agent_minimax.batch_heuristic import heuristic_batch
+from agents.agent_minimax.minimax import heuristic
+from agents.agent_random.batch_playout import play_random_batch
+from agents.dataset import DatasetWriter, PositionDataset, write_dataset, RECORD_DTYPE, SCORED, EXACT, OUTCOME
+from agents.notation import parse_moves, parse_move_array
+
+
+def test_record_size():
+    assert RECORD_DTYPE.itemsize == 20
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'positions.c4d')
+    position = parse_moves('4453616')
+    with DatasetWriter(path, buffer_size=2) as writer:
+        writer.write_position(Position())
+        writer.write_position(position, -3, EXACT)
+        writer.write(1, 3, 2, 7, SCORED)
+    with DatasetWriter(path) as writer:
+        current, mask, plies = parse_move_array(['44', '445'])
+        writer.write_arrays(current, mask, plies, np.array([1, 2]))
+    dataset = PositionDataset(path)
+    assert len(dataset) == 5
+    assert dataset.flags.tolist() == [0, SCORED | EXACT, SCORED, SCORED, SCORED]
+    assert dataset.score.tolist() == [0, -3, 7, 1, 2]
+    loaded = dataset.position(1)
+    assert (loaded.current, loaded.mask, loaded.moves) == (position.current, position.mask, 7)
+    assert dataset.ply[3:].tolist() == [2, 3]
+    dataset.close()
+
+
+def test_write_games(tmp_path):
+    path = str(tmp_path / 'games.c4d')
+    moves, lengths, winners = play_random_batch(50, np.random.default_rng(0))
+    with DatasetWriter(path) as writer:
+        writer.write_games(moves, lengths, winners)
+    dataset = PositionDataset(path)
+    assert len(dataset) == lengths.sum()
+    assert (dataset.flags == SCORED | OUTCOME).all()
+
+    start = 0
+    for game, length, winner in zip(moves, lengths, winners):
+        position = Position()
+        for ply in range(length):
+            record = dataset[start + ply]
+            assert (int(record['current']), int(record['mask']), int(record['ply'])) == \
+                   (position.current, position.mask, ply)
+            expected = 0 if winner == 0 else (1 if winner == 1 + ply % 2 else -1)
+            assert record['score'] == expected
+            position.play(int(game[ply]))
+        start += int(length)
+
+    boards = [(int(b1), int(b1 ^ m)) for b1, m in zip(dataset.board1(), dataset.mask)]
+    assert heuristic_batch(dataset.board1(), dataset.mask).tolist() == [heuristic(board) for board in boards]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'C4BOOK01' + bytes(16))
+    with pytest.raises(ValueError):
+        PositionDataset(str(path))
+    empty = str(tmp_path / 'empty.c4d')
+    write_dataset(empty, [])
+    assert len(PositionDataset(empty)) == 0
+
+
+def test_close_releases_map(tmp_path):
+    path = str(tmp_path / 'close.c4d')
+    write_dataset(path, [(1, 3, 2, 7, SCORED), (0, 0, 0, 0, 0)])
+    dataset = PositionDataset(path)
+    scores = dataset.score[:1]
+    dataset.close()
+    # A view held by the caller keeps the map alive
+    assert scores.tolist() == [7]
+    assert dataset.map is None and dataset.records is None
+    dataset = PositionDataset(path)
+    mapped = dataset.map
+    dataset.close()
+    assert mapped.closed
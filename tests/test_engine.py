@@ -0,0 +1,59 @@
+import io
+import time
+
+from engine import Engine, run_engine
+
+
+def engine_output(commands: str) -> list:
+    output = io.StringIO()
+    run_engine(io.StringIO(commands), output, table_size=100_000)
+    return output.getvalue().splitlines()
+
+
+def test_go_depth():
+    lines = engine_output('position 44\ngo depth 4\n')
+    assert [line.split()[2] for line in lines[:-1]] == ['0', '1', '2', '3', '4']
+    assert lines[-1] in {f'bestmove {col}' for col in range(1, 8)}
+
+
+def test_takes_win():
+    assert engine_output('position 121212\ngo depth 4\n')[-1] == 'bestmove 1'
+
+
+def test_invalid_commands():
+    lines = engine_output('position 48\nposition 1111111\nposition 12121212\nfoo\ngo depth x\ngo depth -1\ngo depth 43\n'
+                          'go movetime -5\nposition 1212121\ngo\n')
+    assert lines == [
+        "info string error invalid column '8' at move 2",
+        'info string error column 1 is full at move 7',
+        'info string error game is over after move 7',
+        'info string error unknown command foo',
+        'info string error invalid go depth x',
+        'info string error invalid go depth -1',
+        'info string error invalid go depth 43',
+        'info string error invalid go movetime -5',
+        'info string error game is over',
+    ]
+
+
+def test_stop_and_isready():
+    output = io.StringIO()
+    engine = Engine(output, table_size=100_000)
+    engine.handle('position 4')
+    t0 = time.perf_counter()
+    engine.handle('go movetime 60000')
+    time.sleep(0.05)
+    engine.handle('stop')
+    assert time.perf_counter() - t0 < 10
+    engine.handle('isready')
+    lines = output.getvalue().splitlines()
+    assert lines[-2].startswith('bestmove') and lines[-1] == 'readyok'
+    assert engine.handle('quit') is False
+
+
+def test_failed_search_answers_bestmove():
+    output = io.StringIO()
+    run_engine(io.StringIO('position 44\ngo depth 2\n'), output, table_size=1_000, book_path='missing-book.bin')
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith('info string error search failed')
+    assert lines[-1] == 'bestmove 4'
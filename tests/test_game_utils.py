@@ -89,3 +89,99 @@ def test_game_over():
     assert connected_four(board2, PLAYER2) is False
     board3 = np.full((6, 7), PLAYER1, dtype=BoardPiece)
     assert connected_four(board3, PLAYER1) is True
+
+
+def test_position_play_undo():
+    board = initialize_game_state()
+    position = Position.from_board(board, PLAYER1)
+    player = PLAYER1
+    for col in (3, 3, 2, 4, 0, 6, 6):
+        board = apply_player_action(board, col, player)
+        position.play(col)
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+        assert position.to_board(player) == board
+        assert position.moves == int.bit_count(board[0] | board[1])
+    for _ in range(7):
+        position.undo()
+    assert (position.current, position.mask, position.moves) == (0, 0, 0)
+
+
+def test_position_can_play():
+    position = Position()
+    for _ in range(6):
+        assert position.can_play(1)
+        position.play(1)
+    assert not position.can_play(1)
+    assert possible_actions(position.to_board(PLAYER1)) == [0, 2, 3, 4, 5, 6]
+
+
+def test_is_winning_move_matches_connected_four():
+    import random
+    rng = random.Random(0)
+    for _ in range(200):
+        board = initialize_game_state()
+        position = Position()
+        player = PLAYER1
+        while True:
+            actions = possible_actions(board)
+            for col in actions:
+                after = apply_player_action(board, col, player)
+                assert position.is_winning_move(col) == connected_four(after, player)
+            assert position.can_win_next() == any(position.is_winning_move(col) for col in actions)
+            col = rng.choice(actions)
+            board = apply_player_action(board, col, player)
+            position.play(col)
+            if check_end_state(board, player) != GameState.STILL_PLAYING:
+                break
+            player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+
+def test_mirror_bitboard():
+    position = Position()
+    mirrored = Position()
+    for col in (0, 1, 1, 5, 6, 6, 3):
+        position.play(col)
+        mirrored.play(mirror_action(col))
+    assert mirror_bitboard(position.current) == mirrored.current
+    assert mirror_bitboard(position.mask) == mirrored.mask
+    assert mirror_bitboard(position.key()) == mirrored.key()
+    assert mirror_bitboard(mirror_bitboard(position.key())) == position.key()
+    assert position.canonical_key()[0] == mirrored.canonical_key()[0] == min(position.key(), mirrored.key())
+    assert position.canonical_key()[1] != mirrored.canonical_key()[1]
+
+
+def test_canonical_key_symmetric_board():
+    position = Position()
+    for col in (3, 3, 2, 4):
+        position.play(col)
+    assert canonical_key(position.key()) == (position.key(), False)
+
+
+def test_board_bitboard_conversion():
+    board = np.full((6, 7), NO_PLAYER, dtype=BoardPiece)
+    board[0, 0] = PLAYER1
+    board[1, 0] = PLAYER2
+    board[0, 6] = PLAYER2
+    board[5, 3] = PLAYER1
+    bitboards = board_to_bitboard(board)
+    assert bitboards == (1 | 1 << (7 * 3 + 5), 1 << 1 | 1 << (7 * 6))
+    assert get_bitboard(board) == bitboards
+    assert (bitboard_to_board(bitboards) == board).all()
+
+    rng = np.random.default_rng(0)
+    boards = rng.choice([NO_PLAYER, PLAYER1, PLAYER2], size=(500, 6, 7)).astype(BoardPiece)
+    board1, board2 = boards_to_bitboards(boards)
+    assert board1.dtype == board2.dtype == np.uint64
+    assert [(int(b1), int(b2)) for b1, b2 in zip(board1, board2)] == [board_to_bitboard(b) for b in boards]
+    assert (bitboards_to_boards(board1, board2) == boards).all()
+
+
+def test_ndarray_agent():
+    def first_free(board, player, saved_state):
+        return possible_actions(board)[0], (board, player)
+
+    board = np.full((6, 7), NO_PLAYER, dtype=BoardPiece)
+    board[:, 0] = PLAYER1
+    action, (bitboards, player) = ndarray_agent(first_free)(board, PLAYER2, None)
+    assert action == 1 and player == PLAYER2
+    assert bitboards == (COLUMN_MASKS[0], 0)
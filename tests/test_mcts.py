@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from agents.game_utils import Position, initialize_game_state, apply_player_action, PLAYER1, PLAYER2, \
+    BOARD_MASK, bitboard_connected_four
+from agents.agent_mcts import generate_move_mcts
+from agents.agent_mcts.mcts import MCTSSavedState, random_playout
+
+
+def test_random_playout_ends_games():
+    rng = random.Random(1)
+    for _ in range(200):
+        assert random_playout(0, 0, rng) in (0.0, 0.5, 1.0)
+
+
+def test_random_playout_full_board_is_draw():
+    position = Position()
+    for col in (0, 1, 2, 3, 4, 5, 6) * 2 + (1, 0, 3, 2, 5, 4, 6) + (0, 1, 2, 3, 4, 5, 6) * 2 + (1, 0, 3, 2, 5, 4):
+        position.play(col)
+    assert not bitboard_connected_four(position.current) and not bitboard_connected_four(position.current ^ position.mask)
+    assert random_playout(position.current, position.mask, random.Random(0)) == 0.5
+    position.play(6)
+    assert position.mask == BOARD_MASK
+
+
+def test_mcts_takes_win():
+    board = initialize_game_state()
+    for col in (0, 1, 0, 1, 0, 1):
+        board = apply_player_action(board, col, PLAYER1 if col == 0 else PLAYER2)
+    action, _ = generate_move_mcts(board, PLAYER1, None, time_limit=None, iterations=100, seed=0)
+    assert action == 0
+
+
+def test_mcts_blocks_loss():
+    board = initialize_game_state()
+    for col, player in ((3, PLAYER1), (0, PLAYER2), (4, PLAYER1), (0, PLAYER2), (5, PLAYER1)):
+        board = apply_player_action(board, col, player)
+    action, _ = generate_move_mcts(board, PLAYER2, None, time_limit=None, iterations=2000, seed=0)
+    assert action in (2, 6)
+
+
+def test_mcts_reuses_tree():
+    board = initialize_game_state()
+    action, saved_state = generate_move_mcts(board, PLAYER1, None, time_limit=None, iterations=2000, seed=0)
+    assert isinstance(saved_state, MCTSSavedState)
+    assert saved_state.iterations == 2000 and saved_state.playouts_per_second > 0
+    child = next(child for child in saved_state.root.children if child.action == action)
+    reply = max(child.children, key=lambda node: node.visits)
+    board = apply_player_action(board, action, PLAYER1)
+    board = apply_player_action(board, reply.action, PLAYER2)
+    visits = reply.visits
+    _, saved_state = generate_move_mcts(board, PLAYER1, saved_state, time_limit=None, iterations=500, seed=0)
+    assert saved_state.root is reply and reply.parent is None
+    assert reply.visits == visits + 500
+
+
+def test_mcts_exhausted_budget_returns_legal_action():
+    board = initialize_game_state()
+    for player in (PLAYER1, PLAYER2) * 3:
+        board = apply_player_action(board, 3, player)
+    action, saved_state = generate_move_mcts(board, PLAYER1, None, time_limit=0.0, seed=0)
+    assert action in (0, 1, 2, 4, 5, 6)
+    assert saved_state.iterations == 1
+    action, _ = generate_move_mcts(board, PLAYER1, None, time_limit=None, iterations=0, seed=0)
+    assert action != 3
+
+
+def test_mcts_needs_a_budget():
+    with pytest.raises(ValueError):
+        generate_move_mcts(initialize_game_state(), PLAYER1, None, time_limit=None, iterations=None)
@@ -1,6 +1,8 @@
 import pytest
+import time
 
 from agents.agent_minimax import *
+from agents.game_utils import initialize_game_state
 import numpy as np
 
 
@@ -38,3 +40,345 @@ def test_calculate_heuristic():
 
     assert type(calculate_heuristic(board,PLAYER1)) is int
     assert calculate_heuristic(board,PLAYER1) > 0
+
+
+def random_board(n_moves: int, seed: int) -> tuple:
+    import random
+    rng = random.Random(seed)
+    board = initialize_game_state()
+    player = PLAYER1
+    for _ in range(n_moves):
+        actions = possible_actions(board)
+        if not actions:
+            break
+        next_board = apply_player_action(board, rng.choice(actions), player)
+        if check_end_state(next_board, player) != GameState.STILL_PLAYING:
+            break
+        board = next_board
+        player = other_player(player)
+    return board, player
+
+
+def test_alpha_beta_matches_minimax():
+    for seed in range(20):
+        board, player = random_board(seed % 12, seed)
+        assert alpha_beta(board, player, 3, -999999, 999999) == minimax(board, player, 3)
+
+
+def test_generate_move_alpha_beta_matches_reference():
+    for seed in range(10):
+        board, player = random_board(2 + seed, seed)
+        action, _ = generate_move_minimax(board, player, None, depth=2)
+        if player == PLAYER2:
+            board = map_board_to_player_one(board)
+        values = {
+            a: minimax(apply_player_action(board, a, PLAYER1), PLAYER2, 2) for a in possible_actions(board)
+        }
+        assert values[action] == max(values.values())
+
+
+def test_ordered_actions_center_first():
+    assert ordered_actions(initialize_game_state()) == [3, 2, 4, 1, 5, 0, 6]
+    board = initialize_game_state()
+    for _ in range(6):
+        board = apply_player_action(board, 3, PLAYER1)
+    assert 3 not in ordered_actions(board)
+
+
+def test_alpha_beta_with_table_matches_minimax():
+    from agents.agent_minimax.transposition_table import TranspositionTable
+    for seed in range(20):
+        board, player = random_board(seed % 12, seed)
+        table = TranspositionTable()
+        assert alpha_beta(board, player, 3, -999999, 999999, table) == minimax(board, player, 3)
+        assert len(table) > 0
+
+
+def test_position_key_unique():
+    from agents.agent_minimax.transposition_table import position_key
+    seen = {}
+    for seed in range(300):
+        board, player = random_board(seed % 20, seed)
+        key = position_key(board, player)
+        assert seen.setdefault(key, (board, player)) == (board, player)
+
+
+def test_transposition_table_size_cap():
+    from agents.agent_minimax.transposition_table import TranspositionTable, EXACT
+    table = TranspositionTable(max_entries=3)
+    for key in range(5):
+        table.store(key, 1, key, EXACT)
+    assert len(table) == 3
+    assert table.get(0) is None
+    assert table.get(4)[1] == 4
+    table.store(4, 0, -1, EXACT)
+    assert table.get(4)[1] == 4
+    table.new_search()
+    table.store(4, 0, -1, EXACT)
+    assert table.get(4)[1] == -1
+
+
+def test_transposition_table_eviction_constant_time():
+    from agents.agent_minimax.transposition_table import TranspositionTable, EXACT
+
+    def store_keys(table, keys):
+        t0 = time.perf_counter()
+        for key in keys:
+            table.store(key, 1, 0, EXACT)
+        return time.perf_counter() - t0
+
+    full = TranspositionTable(max_entries=20_000)
+    store_keys(full, range(100_000))
+    assert len(full) == 20_000
+    assert full.get(79_999) is None and full.get(80_000) is not None
+    # Storing into the full table, which drops the oldest entry every time, must cost about
+    # as much as storing into a table that is not full yet
+    evicting = min(store_keys(full, range(start, start + 40_000)) for start in (100_000, 140_000, 180_000))
+    filling = min(store_keys(TranspositionTable(), range(40_000)) for _ in range(3))
+    assert evicting < 4 * filling
+
+
+def test_saved_state_keeps_table():
+    board, player = random_board(4, 1)
+    action, saved_state = generate_move_minimax(board, player, None, depth=3)
+    assert isinstance(saved_state, MinimaxSavedState)
+    size = len(saved_state.transposition_table)
+    _, saved_state_2 = generate_move_minimax(apply_player_action(board, action, player), player, saved_state, depth=3)
+    assert saved_state_2 is saved_state
+    assert len(saved_state.transposition_table) >= size
+
+
+def test_iterative_deepening_respects_deadline():
+    import time
+    board, player = random_board(6, 3)
+    t0 = time.perf_counter()
+    action, saved_state = generate_move_minimax(board, player, None, depth=42, time_limit=0.2)
+    assert time.perf_counter() - t0 < 0.5
+    assert action in possible_actions(board)
+    assert 0 <= saved_state.depth_reached < 42
+
+
+def test_iterative_deepening_reaches_max_depth():
+    board, player = random_board(6, 4)
+    action, saved_state = generate_move_minimax(board, player, None, depth=3, time_limit=60)
+    assert saved_state.depth_reached == 3
+    if player == PLAYER2:
+        board = map_board_to_player_one(board)
+    values = {a: minimax(apply_player_action(board, a, PLAYER1), PLAYER2, 3) for a in possible_actions(board)}
+    assert values[action] == max(values.values())
+
+
+def test_parallel_search_matches_reference():
+    from agents.agent_minimax.parallel_search import parallel_search_root, shutdown_process_pool
+    from agents.agent_minimax.search_stats import SearchStats
+    try:
+        for seed, split_depth in ((5, 1), (6, 2), (7, 2)):
+            board, player = random_board(seed, seed)
+            if player == PLAYER2:
+                board = map_board_to_player_one(board)
+            stats = SearchStats()
+            action, evaluation = parallel_search_root(board, 2, 2, split_depth, stats)
+            assert stats.nodes > 0
+            values = {a: minimax(apply_player_action(board, a, PLAYER1), PLAYER2, 2) for a in possible_actions(board)}
+            assert evaluation == values[action] == max(values.values())
+    finally:
+        shutdown_process_pool()
+
+
+def worker_table_size() -> int:
+    from agents.agent_minimax import parallel_search
+    return parallel_search._worker_table.max_entries
+
+
+def test_parallel_search_table_size():
+    from agents.agent_minimax.parallel_search import get_process_pool, shutdown_process_pool
+    board, player = random_board(5, 5)
+    try:
+        generate_move_minimax(board, player, None, depth=1, processes=2, table_size=1234)
+        assert get_process_pool(2, 1234).submit(worker_table_size).result() == 1234
+    finally:
+        shutdown_process_pool()
+
+
+def test_search_stats():
+    board, player = random_board(6, 5)
+    _, saved_state = generate_move_minimax(board, player, None, depth=4)
+    assert saved_state.stats is None
+
+    collected = []
+    _, saved_state = generate_move_minimax(board, player, None, depth=4, stats_callback=collected.append)
+    stats = saved_state.stats
+    assert collected == [stats]
+    assert stats.nodes > stats.expanded > 0
+    assert stats.leaves > 0 and stats.cutoffs > 0 and stats.table_probes > 0
+    assert 1 <= stats.branching_factor <= 7
+    assert stats.depth_times == [(4, stats.seconds, stats.nodes)]
+
+
+def test_search_stats_iterative_deepening():
+    board, player = random_board(6, 4)
+    _, saved_state = generate_move_minimax(board, player, None, depth=4, time_limit=60, collect_stats=True)
+    depth_times = saved_state.stats.depth_times
+    assert [depth for depth, _, _ in depth_times] == [0, 1, 2, 3, 4]
+    assert [nodes for _, _, nodes in depth_times] == sorted(nodes for _, _, nodes in depth_times)
+    assert depth_times[-1][2] == saved_state.stats.nodes
+
+
+def test_stop_deadline():
+    deadline = StopDeadline(time.perf_counter() + 60)
+    assert not time.perf_counter() > deadline
+    deadline.stop = True
+    assert time.perf_counter() > deadline
+    assert time.perf_counter() > StopDeadline(time.perf_counter() - 1)
+
+    board, player = random_board(6, 4)
+    deadline = StopDeadline()
+    deadline.stop = True
+    _, saved_state = generate_move_minimax(board, player, None, depth=8, deadline=deadline)
+    assert saved_state.depth_reached == 0
+
+
+def test_array_transposition_table_buckets():
+    from agents.agent_minimax.transposition_table import ArrayTranspositionTable, EXACT, LOWER_BOUND
+    table = ArrayTranspositionTable(0.001)
+    buckets = table.buckets
+    assert table.nbytes <= 0.001 * (1 << 20)
+    table.store(0, 5, -37, LOWER_BOUND, 3)
+    assert table.get(0) == (5, -37, LOWER_BOUND, 3, 0)
+    table.store(0, 3, 12, EXACT)
+    assert table.get(0)[1] == -37
+    # A shallower result of another key goes into the always-replace entry of the bucket
+    table.store(buckets, 1, 5, EXACT)
+    table.store(2 * buckets, 1, 6, EXACT, 0)
+    assert table.get(buckets) is None
+    assert table.get(0)[1] == -37 and table.get(2 * buckets) == (1, 6, EXACT, 0, 0)
+    table.new_search()
+    table.store(buckets, 1, 7, EXACT)
+    assert table.get(0) is None and table.get(buckets)[1] == 7
+    assert len(table) == 2
+    keys = table.keys
+    table.clear()
+    assert len(table) == 0 and table.keys is keys and table.get(buckets) is None
+
+
+def test_array_transposition_table_equal_depths():
+    from agents.agent_minimax.transposition_table import ArrayTranspositionTable, EXACT, LOWER_BOUND
+    table = ArrayTranspositionTable(0.001)
+    buckets = table.buckets
+    # Results of equal depth, like all results of the solver, use both entries of a bucket
+    table.store(0, 0, 1, LOWER_BOUND)
+    table.store(buckets, 0, 2, LOWER_BOUND)
+    assert table.get(0)[1] == 1 and table.get(buckets)[1] == 2
+    table.store(0, 0, 3, EXACT)
+    assert table.get(0)[1] == 3 and table.get(buckets)[1] == 2
+    table.store(2 * buckets, 0, 4, LOWER_BOUND)
+    assert table.get(0)[1] == 3 and table.get(buckets) is None and table.get(2 * buckets)[1] == 4
+
+
+def test_array_transposition_table_pickle():
+    import pickle
+    from agents.agent_minimax.transposition_table import ArrayTranspositionTable, EXACT
+    table = ArrayTranspositionTable(0.01)
+    table.store(12345, 4, -7, EXACT, 2)
+    table.new_search()
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy.get(12345) == table.get(12345) and copy.generation == 1
+    copy.store(54321, 1, 5, EXACT)
+    assert copy.get(54321)[1] == 5 and table.get(54321) is None
+    saved_state = pickle.loads(pickle.dumps(MinimaxSavedState(table_mb=0.01)))
+    board, player = random_board(4, 1)
+    action, _ = generate_move_minimax(board, player, saved_state, depth=3)
+    assert action in possible_actions(board) and len(saved_state.transposition_table) > 0
+
+
+def test_array_transposition_table_search():
+    from agents.agent_minimax.transposition_table import ArrayTranspositionTable, TranspositionTable
+    for seed in range(10):
+        board, player = random_board(seed % 10, seed)
+        if player == PLAYER2:
+            board = map_board_to_player_one(board)
+        expected = search_root(board, 4, TranspositionTable())[1]
+        assert search_root(board, 4, ArrayTranspositionTable(0.01))[1] == expected
+        assert search_root(board, 4, ArrayTranspositionTable(1))[1] == expected
+    _, saved_state = generate_move_minimax(board, PLAYER1, None, depth=4, table_mb=1)
+    assert isinstance(saved_state.transposition_table, ArrayTranspositionTable)
+    assert len(saved_state.transposition_table) > 0
+
+
+def test_move_ordering_order():
+    from agents.agent_minimax.move_ordering import MoveOrdering
+    ordering = MoveOrdering()
+    assert ordering.order(0, 0, 0, 0, None) == [3, 2, 4, 1, 5, 0, 6]
+    assert ordering.order(0, 0, 0, 0, 6) == [6, 3, 2, 4, 1, 5, 0]
+    ordering.record_cutoff(0, 0, 5, 3)
+    ordering.record_cutoff(0, 0, 0, 1)
+    assert ordering.killers[0] == [0, 5]
+    assert ordering.history[0][5] == 9
+    assert ordering.order(0, 0, 0, 0, None)[:2] == [5, 0]
+    # Killers only apply to their ply, history only to its side to move
+    assert ordering.order(0, 0, 1, 1, None)[0] == 3
+    assert ordering.order(0, 0, 1, 0, None)[0] == 5
+
+    # Playing column 1 or 4 next to the pieces in columns 2 and 3 leaves two cells that complete four
+    current = (1 << 14) | (1 << 21)
+    mask = current | (0b11 << 42)
+    assert MoveOrdering().order(current, mask, 4, 0, None)[:2] == [4, 1]
+    full = sum(0b111111 << (7 * col) for col in (0, 6))
+    assert MoveOrdering().order(0, full, 12, 0, None) == [3, 2, 4, 1, 5]
+
+
+def test_move_ordering_search_matches_minimax():
+    from agents.agent_minimax.move_ordering import MoveOrdering
+    from agents.agent_minimax.search_stats import SearchStats
+    from agents.agent_minimax.transposition_table import TranspositionTable
+    for seed in range(20):
+        board, player = random_board(seed % 12, seed)
+        ordering = MoveOrdering()
+        stats = SearchStats()
+        evaluation = alpha_beta(board, player, 3, -999999, 999999, TranspositionTable(), stats=stats, ordering=ordering)
+        assert evaluation == minimax(board, player, 3)
+        assert 0 <= stats.first_cutoffs <= stats.cutoffs
+        assert 0 <= stats.first_move_cutoff_rate <= 1
+    for seed in range(5):
+        board, player = random_board(4 + seed, seed)
+        if player == PLAYER2:
+            board = map_board_to_player_one(board)
+        expected = search_root(board, 5, TranspositionTable())[1]
+        assert search_root(board, 5, TranspositionTable(), ordering=MoveOrdering())[1] == expected
+
+
+def test_move_ordering_first_move_cutoff_rate():
+    board, player = random_board(4, 2)
+    _, saved_state = generate_move_minimax(board, player, None, depth=6, collect_stats=True)
+    ordered = saved_state.stats
+    _, saved_state = generate_move_minimax(board, player, None, depth=6, collect_stats=True, move_ordering=False)
+    static = saved_state.stats
+    assert ordered.first_cutoffs > 0
+    assert ordered.as_dict()['first_move_cutoff_rate'] == ordered.first_move_cutoff_rate
+    assert ordered.nodes < static.nodes
+
+
+def test_solver_respects_time_limit():
+    from agents.notation import parse_moves
+    # Solving this position exactly takes many seconds
+    position = parse_moves('257771314744')
+    board = position.to_board(PLAYER1)
+    t0 = time.perf_counter()
+    action, saved_state = generate_move_minimax(board, PLAYER1, None, depth=20, time_limit=0.2, solver_threshold=30)
+    assert time.perf_counter() - t0 < 1.0
+    assert action in possible_actions(board)
+    assert saved_state.score is None and saved_state.depth_reached < 30
+
+    deadline = StopDeadline()
+    deadline.stop = True
+    t0 = time.perf_counter()
+    action, saved_state = generate_move_minimax(board, PLAYER1, None, depth=20, deadline=deadline, solver_threshold=30)
+    assert time.perf_counter() - t0 < 1.0
+    assert action in possible_actions(board) and saved_state.depth_reached == 0
+
+
+def test_solver_finishes_within_time_limit():
+    board, player = random_board(30, 2)
+    empty_cells = 42 - int.bit_count(board[0] | board[1])
+    _, saved_state = generate_move_minimax(board, player, None, time_limit=60, solver_threshold=42)
+    assert saved_state.score is not None and saved_state.depth_reached == empty_cells
@@ -0,0 +1,77 @@
+import numpy as np
+
+from agents.game_utils import NO_PLAYER, PLAYER1, PLAYER2, BoardPiece
+from agents.agent_minimax.minimax_bitboard import WINDOWS, heuristic, connected_four, connected_three, \
+    connected_two, map_board_to_player_one, apply_player_action, possible_actions, generate_move_minimax, minimax
+
+
+def reference_windows() -> set:
+    windows = set()
+    for row in range(6):
+        for col in range(7):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + k * d_row, col + k * d_col) for k in range(4)]
+                if all(0 <= r < 6 and 0 <= c < 7 for r, c in cells):
+                    windows.add(tuple(sorted(r * 7 + c for r, c in cells)))
+    return windows
+
+
+def reference_heuristic(board: np.ndarray) -> int:
+    flat = board.reshape(42)
+    counts = [(sum(flat[i] == PLAYER1 for i in w), sum(flat[i] == PLAYER2 for i in w)) for w in reference_windows()]
+    if any(ones == 4 for ones, _ in counts):
+        return 100
+    if any(twos == 4 for _, twos in counts):
+        return -100
+    return sum(int(ones in (2, 3) and twos == 0) - int(twos in (2, 3) and ones == 0) for ones, twos in counts)
+
+
+def random_boards(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.choice([NO_PLAYER, PLAYER1, PLAYER2], size=(count, 6, 7), p=[0.6, 0.2, 0.2]).astype(BoardPiece)
+
+
+def test_windows():
+    assert WINDOWS.shape == (69, 4)
+    assert {tuple(sorted(window)) for window in WINDOWS.tolist()} == reference_windows()
+
+
+def test_heuristic_matches_reference_and_batch():
+    boards = random_boards(300)
+    batch = heuristic(boards)
+    assert batch.shape == (300,)
+    for board, value in zip(boards, batch):
+        assert heuristic(board) == value == reference_heuristic(board)
+        assert type(heuristic(board)) is int
+
+
+def test_counts():
+    board = np.full((6, 7), NO_PLAYER, dtype=BoardPiece)
+    board[0, :3] = PLAYER1
+    assert connected_three(board, PLAYER1) == 1
+    assert connected_two(board, PLAYER1) == 1
+    assert connected_three(board, PLAYER2) == 0
+    assert not connected_four(board, PLAYER1)
+    board[0, 3] = PLAYER1
+    assert connected_four(board, PLAYER1) and heuristic(board) == 100
+    boards = np.stack([board, map_board_to_player_one(board)])
+    assert connected_four(boards, PLAYER2).tolist() == [False, True]
+    assert heuristic(boards).tolist() == [100, -100]
+
+
+def test_map_board_to_player_one():
+    board = random_boards(1)[0]
+    mapped = map_board_to_player_one(board)
+    assert ((board == PLAYER1) == (mapped == PLAYER2)).all()
+    assert ((board == NO_PLAYER) == (mapped == NO_PLAYER)).all()
+    assert mapped is not board
+
+
+def test_minimax_takes_win():
+    board = np.full((6, 7), NO_PLAYER, dtype=BoardPiece)
+    for _ in range(3):
+        board = apply_player_action(board, 2, PLAYER2)
+        board = apply_player_action(board, 5, PLAYER1)
+    assert possible_actions(board) == list(range(7))
+    assert generate_move_minimax(board, PLAYER2, None, 2)[0] == 2
+    assert minimax(board, PLAYER2, 1) == -100 and minimax(board, PLAYER1, 1) == 100
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from agents.game_utils import Position
+from agents.agent_random.batch_playout import play_random_batch
+from agents.notation import parse_moves, format_moves, position_actions, parse_move_array, iter_position_file, \
+    load_position_file
+
+
+def random_sequences(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    moves, lengths, _ = play_random_batch(count, rng)
+    return [format_moves(game[:rng.integers(1, length + 1)]) for game, length in zip(moves, lengths)]
+
+
+def test_parse_and_format():
+    position = parse_moves('4453616')
+    expected = Position()
+    for col in (3, 3, 4, 2, 5, 0, 5):
+        expected.play(col)
+    assert (position.current, position.mask, position.moves) == (expected.current, expected.mask, 7)
+    assert position_actions(position) == [3, 3, 4, 2, 5, 0, 5]
+    assert format_moves(position_actions(position)) == '4453616'
+    assert parse_moves('').mask == 0
+
+
+@pytest.mark.parametrize('moves, message', [
+    ('48', "invalid column '8' at move 2"),
+    ('4 ', "invalid column ' ' at move 2"),
+    ('1111111', 'column 1 is full at move 7'),
+    ('12121212', 'game is over after move 7'),
+])
+def test_parse_invalid(moves, message):
+    with pytest.raises(ValueError, match=message):
+        parse_moves(moves)
+    with pytest.raises(ValueError, match=f'sequence 1: {message}'):
+        parse_move_array(['4', moves])
+
+
+def test_parse_move_array_matches_parse_moves():
+    sequences = random_sequences(3000) + ['']
+    current, mask, plies = parse_move_array(sequences)
+    for index, sequence in enumerate(sequences):
+        position = parse_moves(sequence)
+        assert (int(current[index]), int(mask[index]), int(plies[index])) == \
+               (position.current, position.mask, position.moves)
+
+
+def test_load_position_file(tmp_path):
+    sequences = random_sequences(1000, 1)
+    path = tmp_path / 'positions.txt'
+    path.write_text(''.join(f'{sequence} {index % 37 - 18}\n' for index, sequence in enumerate(sequences)))
+    current, mask, plies, scores = load_position_file(str(path), chunk_size=300)
+    assert np.array_equal(scores, [index % 37 - 18 for index in range(1000)])
+    assert np.array_equal(current, parse_move_array(sequences)[0])
+    assert len(list(iter_position_file(str(path), chunk_size=300))) == 4
+
+    path.write_text('\n'.join(sequences))
+    current, mask, plies, scores = load_position_file(str(path))
+    assert scores is None and np.array_equal(plies, [len(sequence) for sequence in sequences])
+
+    path.write_text('44 1\n45 2\n4\n')
+    with pytest.raises(ValueError, match='line 3'):
+        load_position_file(str(path))
+    path.write_text('44\n45\n1111111\n')
+    with pytest.raises(ValueError, match='line 3: column 1 is full at move 7'):
+        load_position_file(str(path))
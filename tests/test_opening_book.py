@@ -0,0 +1,46 @@
+from agents.game_utils import Position, initialize_game_state, apply_player_action, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import generate_move_minimax
+from agents.game_utils import mirror_bitboard
+from agents.agent_minimax.opening_book import build_opening_book, enumerate_positions, OpeningBook, book_key, \
+    score_position
+
+
+def test_enumerate_positions_folds_mirrors():
+    entries = enumerate_positions(2)
+    assert len([entry for entry in entries if entry[3] == 1]) == 4
+    assert len([entry for entry in entries if entry[3] == 2]) == 25
+    assert [entry[0] for entry in entries] == sorted(entry[0] for entry in entries)
+
+
+def test_book_key_mirror():
+    position = Position()
+    mirrored = Position()
+    for col in (0, 1, 1, 4):
+        position.play(col)
+        mirrored.play(6 - col)
+    assert book_key(position) == book_key(mirrored)
+    assert mirror_bitboard(mirror_bitboard(position.mask)) == position.mask
+
+
+def test_build_and_probe_book(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    count = build_opening_book(path, max_ply=3, depth=1, processes=1)
+    book = OpeningBook(path)
+    try:
+        assert len(book) == count == len(enumerate_positions(3))
+        position = Position()
+        position.play(2)
+        position.play(5)
+        assert book.get(position) == score_position(position.current, position.mask, 2, 1)
+        col = book.best_move(position)
+        assert position.can_play(col)
+
+        board = apply_player_action(apply_player_action(initialize_game_state(), 2, PLAYER1), 5, PLAYER2)
+        action, _ = generate_move_minimax(board, PLAYER1, None, book_path=path)
+        assert action == col
+
+        for _ in range(3):
+            position.play(3)
+        assert book.best_move(position) is None
+    finally:
+        book.close()
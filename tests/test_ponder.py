@@ -0,0 +1,80 @@
+from agents.game_utils import initialize_game_state, apply_player_action, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import MinimaxSavedState, generate_move_minimax
+from agents.agent_minimax.ponder import Ponderer, PonderingSavedState, generate_move_pondering
+from agents.agent_minimax.transposition_table import position_key
+
+
+def test_ponderer_fills_replies():
+    board = apply_player_action(initialize_game_state(), 3, PLAYER1)
+    saved_state = MinimaxSavedState()
+    ponderer = Ponderer(board, PLAYER1, saved_state, 3)
+    ponderer.start()
+    ponderer.thread.join()
+    assert len(saved_state.pondered) == 7
+    for reply in range(7):
+        child = apply_player_action(board, reply, PLAYER2)
+        action, depth = saved_state.pondered[position_key(child, PLAYER1)]
+        assert depth == 3
+        assert 0 <= action <= 6
+
+
+def test_pondered_move_is_not_searched():
+    board = apply_player_action(initialize_game_state(), 3, PLAYER1)
+    saved_state = MinimaxSavedState()
+    ponderer = Ponderer(board, PLAYER1, saved_state, 4)
+    ponderer.start()
+    ponderer.thread.join()
+    board = apply_player_action(board, 2, PLAYER2)
+    action, saved_state = generate_move_minimax(board, PLAYER1, saved_state, 4, collect_stats=True)
+    assert action == saved_state.pondered[position_key(board, PLAYER1)][0]
+    assert saved_state.stats.nodes == 0
+
+
+def test_generate_move_pondering_stops_between_moves():
+    board = initialize_game_state()
+    action, saved_state = generate_move_pondering(board, PLAYER2, None, depth=3, ponder_depth=40)
+    assert isinstance(saved_state, PonderingSavedState)
+    ponderer = saved_state.ponderer
+    assert ponderer.thread.is_alive()
+    board = apply_player_action(board, action, PLAYER2)
+    board = apply_player_action(board, 3, PLAYER1)
+    action, saved_state = generate_move_pondering(board, PLAYER2, saved_state, depth=3, ponder_depth=40)
+    assert not ponderer.thread.is_alive()
+    assert 0 <= action <= 6
+    saved_state.ponderer.stop()
+
+
+def test_stop_pondering():
+    from agents.agent_minimax.ponder import stop_pondering
+    _, saved_state = generate_move_pondering(initialize_game_state(), PLAYER1, None, depth=2, ponder_depth=40)
+    ponderer = saved_state.ponderer
+    stop_pondering(saved_state)
+    assert saved_state.ponderer is None and not ponderer.thread.is_alive()
+    stop_pondering(saved_state)
+    stop_pondering(None)
+    stop_pondering(MinimaxSavedState())
+
+
+def test_game_end_stops_pondering():
+    from main import human_vs_agent
+    ponderers = []
+
+    def pondering_agent(board, player, saved_state):
+        # Always playing the leftmost column loses quickly, so the game ends on the opponent's move
+        # while the replies of an early position are still pondered
+        if not isinstance(saved_state, PonderingSavedState):
+            saved_state = PonderingSavedState(10_000)
+        if saved_state.ponderer is not None:
+            saved_state.ponderer.stop()
+        action = next(col for col in range(7) if not (board[0] | board[1]) & (1 << (7 * col + 5)))
+        saved_state.ponderer = Ponderer(apply_player_action(board, action, player), player, saved_state, 40)
+        saved_state.ponderer.start()
+        ponderers.append(saved_state.ponderer)
+        return action, saved_state
+
+    def minimax_agent(board, player, saved_state):
+        return generate_move_minimax(board, player, saved_state, depth=4)
+
+    human_vs_agent(pondering_agent, minimax_agent)
+    assert len(ponderers) > 2
+    assert not any(ponderer.thread.is_alive() for ponderer in ponderers)
@@ -0,0 +1,81 @@
+import asyncio
+
+from agents.game_utils import initialize_game_state, apply_player_action, PLAYER1, PLAYER2
+from server import GameServer, Session, run_load
+
+
+async def exchange(port: int, commands: list) -> list:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    answers = []
+    for command in commands:
+        writer.write((command + '\n').encode())
+        await writer.drain()
+        answers.append((await reader.readline()).decode().strip())
+    writer.close()
+    return answers
+
+
+async def with_server(coroutine, **options):
+    server = GameServer(processes=1, move_time=2.0, depth=2, **options)
+    port = await server.start()
+    try:
+        return await coroutine(port), server
+    finally:
+        await server.close()
+
+
+def test_illegal_moves_are_rejected():
+    commands = ['move 3', 'new first', 'move x', 'move 7', 'move 0', 'foo']
+    answers, _ = asyncio.run(with_server(lambda port: exchange(port, commands)))
+    assert answers[0] == 'error no game, start one with new'
+    assert answers[1] == 'ok'
+    assert answers[2] == 'error not the right format, try an integer'
+    assert answers[3] == 'error column is not in the range of possible columns (0 - 6)'
+    assert answers[4].startswith('move ')
+    assert answers[5] == 'error unknown command foo'
+
+
+def test_engine_moves_first_and_wins():
+    commands = ['new second'] + ['move 0'] * 3
+    answers, _ = asyncio.run(with_server(lambda port: exchange(port, commands)))
+    assert all(answer.startswith('move ') for answer in answers)
+    assert answers[-1].endswith('result loss')
+
+
+def test_column_full():
+    async def move_into_full_column():
+        server = GameServer(processes=1)
+        session = Session()
+        session.board = initialize_game_state()
+        for player in (PLAYER1, PLAYER2) * 3:
+            session.board = apply_player_action(session.board, 0, player)
+        session.engine_player = PLAYER2
+        answer = await server.handle(session, ['move', '0'])
+        await server.close()
+        return answer
+
+    assert asyncio.run(move_into_full_column()) == 'error column is full'
+
+
+def test_load_generator():
+    result, _ = asyncio.run(with_server(lambda port: run_load('127.0.0.1', port, 4, 2)))
+    assert result['games'] == 8
+    assert result['win'] + result['loss'] + result['draw'] == 8 and result['error'] == 0
+    assert result['moves'] > 0 and result['p99_ms'] >= result['p50_ms'] > 0
+
+
+def test_failed_submit_frees_slot():
+    async def move_after_shutdown():
+        server = GameServer(processes=1, max_pending=1)
+        session = Session()
+        session.board = initialize_game_state()
+        session.engine_player = PLAYER1
+        server.pool.shutdown()
+        try:
+            await server.engine_move(session)
+        except RuntimeError:
+            pass
+        await server.close()
+        return server.pending.locked()
+
+    assert not asyncio.run(move_after_shutdown())
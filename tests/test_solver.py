@@ -0,0 +1,67 @@
+import random
+
+from agents.game_utils import Position, PLAYER1, PLAYER2
+from agents.agent_minimax.solver import solve, solve_move
+from agents.agent_minimax.minimax import generate_move_minimax
+from agents.agent_minimax.transposition_table import TranspositionTable
+
+
+def full_width_score(position: Position) -> int:
+    if position.can_win_next():
+        return (43 - position.moves) // 2
+    if position.moves == 42:
+        return 0
+    best = -42
+    for col in range(7):
+        if position.can_play(col):
+            position.play(col)
+            best = max(best, -full_width_score(position))
+            position.undo()
+    return best
+
+
+def random_position(empty_cells: int, rng: random.Random) -> Position:
+    while True:
+        position = Position()
+        while 42 - position.moves > empty_cells:
+            col = rng.choice([col for col in range(7) if position.can_play(col)])
+            if position.is_winning_move(col):
+                break
+            position.play(col)
+        else:
+            if not position.can_win_next():
+                return position
+
+
+def test_solve_matches_full_width_search():
+    rng = random.Random(0)
+    for _ in range(30):
+        position = random_position(9, rng)
+        assert solve(position) == full_width_score(position)
+        assert position.history and position.moves == 33
+
+
+def test_solve_move_reaches_score():
+    rng = random.Random(1)
+    table = TranspositionTable()
+    for _ in range(20):
+        position = random_position(9, rng)
+        col, score = solve_move(position, table)
+        assert position.can_play(col)
+        if position.is_winning_move(col):
+            assert score == (43 - position.moves) // 2
+        else:
+            position.play(col)
+            assert -full_width_score(position) == score
+            position.undo()
+
+
+def test_generate_move_switches_to_solver():
+    rng = random.Random(2)
+    position = random_position(14, rng)
+    player = PLAYER1 if position.moves % 2 == 0 else PLAYER2
+    board = position.to_board(player)
+    action, saved_state = generate_move_minimax(board, player, None, solver_threshold=14)
+    assert saved_state.score == solve(position)
+    _, saved_state = generate_move_minimax(board, player, None, depth=2, solver_threshold=13)
+    assert saved_state.score is None
@@ -0,0 +1,63 @@
+import random
+
+from agents.game_utils import Position, PLAYER1, PLAYER2
+from agents.agent_minimax.minimax import heuristic, alpha_beta, search_root, generate_move_minimax, \
+    map_board_to_player_one
+from agents.agent_minimax.threat_position import ThreatPosition
+from agents.agent_minimax.transposition_table import TranspositionTable
+
+
+def player_to_move(position: Position):
+    return PLAYER1 if position.moves % 2 == 0 else PLAYER2
+
+
+def test_evaluation_matches_heuristic():
+    # Games go on after a connected four, so won boards and full boards are compared as well
+    rng = random.Random(7)
+    for _ in range(500):
+        position = ThreatPosition()
+        actions = []
+        while position.moves < 42:
+            action = rng.choice([col for col in range(7) if position.can_play(col)])
+            position.play(action)
+            actions.append(action)
+            board = position.to_board(player_to_move(position))
+            assert position.evaluation == heuristic(board), actions
+            if rng.random() < 0.25:
+                position.undo()
+                actions.pop()
+                assert position.evaluation == heuristic(position.to_board(player_to_move(position))), actions
+        fresh = ThreatPosition.from_board(board, player_to_move(position))
+        assert fresh.threats == position.threats and fresh.evaluation == position.evaluation
+
+
+def test_undo_restores_position():
+    rng = random.Random(3)
+    position = ThreatPosition.from_board((0b1_0000001, 0b10_0000000), PLAYER1)
+    start = (position.current, position.mask, position.moves, position.side, position.threats, position.evaluation)
+    for _ in range(20):
+        position.play(rng.choice([col for col in range(7) if position.can_play(col)]))
+    for _ in range(20):
+        position.undo()
+    assert (position.current, position.mask, position.moves, position.side, position.threats,
+            position.evaluation) == start
+
+
+def test_search_matches_plain_evaluation():
+    rng = random.Random(11)
+    for _ in range(10):
+        position = Position()
+        for _ in range(rng.randrange(10)):
+            if position.can_win_next():
+                break
+            position.play(rng.choice([col for col in range(7) if position.can_play(col)]))
+        player = player_to_move(position)
+        board = position.to_board(player)
+        assert alpha_beta(board, player, 4, -999999, 999999, TranspositionTable(), incremental=True) \
+            == alpha_beta(board, player, 4, -999999, 999999, TranspositionTable())
+        if player == PLAYER2:
+            board = map_board_to_player_one(board)
+        assert search_root(board, 4, TranspositionTable(), incremental=True) \
+            == search_root(board, 4, TranspositionTable())
+        assert generate_move_minimax(board, PLAYER1, None, 4)[0] \
+            == generate_move_minimax(board, PLAYER1, None, 4, incremental_eval=False)[0]
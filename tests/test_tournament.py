@@ -0,0 +1,49 @@
+import json
+
+from agents.agent_minimax import generate_move_minimax
+from agents.agent_random import generate_move
+from tournament import play_game, run_tournament, random_opening
+
+
+def first_column(board, player, saved_state):
+    return 0, saved_state
+
+
+def second_column(board, player, saved_state):
+    return 1, saved_state
+
+
+def test_play_game_win():
+    record = play_game(first_column, second_column)
+    assert record['winner'] == 1
+    assert record['result'] == 'win'
+    assert record['moves'] == [0, 1, 0, 1, 0, 1, 0]
+    assert len(record['latencies_1']) == 4
+
+
+def test_play_game_illegal_move():
+    record = play_game(first_column, first_column)
+    assert record['result'] == 'illegal_move'
+    assert record['winner'] == 2
+    assert record['moves'] == [0] * 6
+
+
+def test_play_game_time_forfeit():
+    record = play_game(generate_move_minimax, first_column, opening=(3, 3), move_time_limit=0.0)
+    assert record['result'] == 'time_forfeit'
+    assert record['winner'] == 2
+    assert record['moves'] == [3, 3]
+
+
+def test_random_opening_is_legal():
+    import random
+    assert len(random_opening(6, random.Random(0))) == 6
+
+
+def test_run_tournament(tmp_path):
+    path = tmp_path / 'games.jsonl'
+    summary = run_tournament(generate_move_minimax, generate_move, 4, str(path), args_1=(1,), processes=1)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sorted(record['game'] for record in records) == [0, 1, 2, 3]
+    assert sum(summary.values()) == 4
+    assert records[0]['moves'][:2] == [r for r in records if r['game'] == records[0]['game'] ^ 1][0]['moves'][:2]
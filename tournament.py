@@ -0,0 +1,196 @@
+import argparse
+import json
+import random
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from agents.game_utils import GenMove, PLAYER1, PLAYER2, GameState, initialize_game_state, apply_player_action, \
+    check_end_state, possible_actions
+from agents.agent_random import generate_move
+from agents.agent_minimax import generate_move_minimax
+from agents.agent_mcts import generate_move_mcts
+from agents.agent_minimax.search_stats import search_nodes
+
+"""
+Headless agent-vs-agent games for comparing engines. Games run in a process pool and every
+finished game is written as one JSON line.
+"""
+
+AGENTS = {
+    'minimax': partial(generate_move_minimax, collect_stats=True),
+    'mcts': generate_move_mcts,
+    'random': generate_move,
+}
+
+
+def random_opening(moves: int, rng: random.Random) -> list:
+    """Random legal actions for the start of a game, none of which ends it"""
+    board = initialize_game_state()
+    player = PLAYER1
+    opening = []
+    while len(opening) < moves:
+        action = rng.choice(possible_actions(board))
+        next_board = apply_player_action(board, action, player)
+        if check_end_state(next_board, player) != GameState.STILL_PLAYING:
+            continue
+        opening.append(action)
+        board = next_board
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+    return opening
+
+
+def play_game(
+        generate_move_1: GenMove, generate_move_2: GenMove, opening: tuple = (),
+        args_1: tuple = (), args_2: tuple = (), move_time_limit: Optional[float] = None
+) -> dict:
+    """Plays one game without any output, generate_move_1 moving first
+
+    A player loses at once when it returns a full or non-existing column, or when a move takes
+    longer than move_time_limit seconds.
+
+    Parameters
+    ----------
+    generate_move_1, generate_move_2 : GenMove
+        The agents of the player to move first and second
+    opening : tuple
+        Actions played before the agents take over
+    args_1, args_2 : tuple
+        Extra arguments passed to the agents
+    move_time_limit : float, optional
+        Seconds an agent may take for a move
+
+    Returns
+    -------
+    dict
+        moves, winner (1, 2 or None for a draw), result, and per agent move latencies and node counts
+    """
+    board = initialize_game_state()
+    player = PLAYER1
+    moves = []
+    for action in opening:
+        board = apply_player_action(board, action, player)
+        moves.append(int(action))
+        player = PLAYER2 if player == PLAYER1 else PLAYER1
+
+    gen_moves = {PLAYER1: generate_move_1, PLAYER2: generate_move_2}
+    gen_args = {PLAYER1: args_1, PLAYER2: args_2}
+    saved_state = {PLAYER1: None, PLAYER2: None}
+    latencies = {PLAYER1: [], PLAYER2: []}
+    nodes = {PLAYER1: [], PLAYER2: []}
+    winner, result = None, 'draw'
+    while True:
+        t0 = time.perf_counter()
+        action, saved_state[player] = gen_moves[player](board, player, saved_state[player], *gen_args[player])
+        latency = time.perf_counter() - t0
+        latencies[player].append(latency)
+        nodes[player].append(search_nodes(saved_state[player]))
+        other = PLAYER2 if player == PLAYER1 else PLAYER1
+        if move_time_limit is not None and latency > move_time_limit:
+            winner, result = other, 'time_forfeit'
+            break
+        if action not in possible_actions(board):
+            winner, result = other, 'illegal_move'
+            break
+        board = apply_player_action(board, action, player)
+        moves.append(int(action))
+        end_state = check_end_state(board, player)
+        if end_state == GameState.IS_WIN:
+            winner, result = player, 'win'
+            break
+        if end_state == GameState.IS_DRAW:
+            break
+        player = other
+
+    return {
+        'moves': moves,
+        'opening_length': len(opening),
+        'winner': None if winner is None else int(winner),
+        'result': result,
+        'latencies_1': latencies[PLAYER1],
+        'latencies_2': latencies[PLAYER2],
+        'nodes_1': nodes[PLAYER1],
+        'nodes_2': nodes[PLAYER2],
+    }
+
+
+def _play_tournament_game(game: int, agent_1, agent_2, opening, args_1, args_2, move_time_limit) -> dict:
+    # Agent 1 moves first in even games, agent 2 in odd games
+    if game % 2 == 0:
+        record = play_game(agent_1, agent_2, opening, args_1, args_2, move_time_limit)
+        winner = {None: None, 1: 'agent_1', 2: 'agent_2'}[record['winner']]
+        first = 'agent_1'
+    else:
+        record = play_game(agent_2, agent_1, opening, args_2, args_1, move_time_limit)
+        winner = {None: None, 1: 'agent_2', 2: 'agent_1'}[record['winner']]
+        first = 'agent_2'
+    return {'game': game, 'first': first, 'winner_agent': winner, **record}
+
+
+def run_tournament(
+        agent_1: GenMove, agent_2: GenMove, games: int, output_path: str,
+        args_1: tuple = (), args_2: tuple = (), opening_moves: int = 2,
+        move_time_limit: Optional[float] = None, processes: Optional[int] = None, seed: int = 0
+) -> dict:
+    """Plays games between two agents in a process pool and appends each result to a JSONL file
+
+    Consecutive pairs of games share the same random opening with the colors swapped.
+
+    Parameters
+    ----------
+    agent_1, agent_2 : GenMove
+        The agents, which have to be picklable (module level functions)
+    games : int
+        Number of games
+    output_path : str
+        JSONL file every finished game is appended to
+    args_1, args_2 : tuple
+        Extra arguments passed to the agents
+    opening_moves : int
+        Number of random actions at the start of every game
+    move_time_limit : float, optional
+        Seconds an agent may take for a move before losing the game
+    processes : int, optional
+        Number of worker processes, by default one per core
+    seed : int
+        Seed of the random openings
+
+    Returns
+    -------
+    dict
+        Number of wins of each agent and of draws
+    """
+    rng = random.Random(seed)
+    openings = [random_opening(opening_moves, rng) for _ in range((games + 1) // 2)]
+    summary = {'agent_1': 0, 'agent_2': 0, 'draw': 0}
+    with ProcessPoolExecutor(processes) as pool, open(output_path, 'a') as output:
+        futures = [
+            pool.submit(
+                _play_tournament_game, game, agent_1, agent_2, openings[game // 2], args_1, args_2, move_time_limit
+            )
+            for game in range(games)
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            summary[record['winner_agent'] or 'draw'] += 1
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Play games between two agents without any output')
+    parser.add_argument('agent_1', choices=sorted(AGENTS))
+    parser.add_argument('agent_2', choices=sorted(AGENTS))
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--output', default='tournament.jsonl', help='JSONL file the games are appended to')
+    parser.add_argument('--opening-moves', type=int, default=2)
+    parser.add_argument('--move-time-limit', type=float, default=None, help='seconds per move')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run_tournament(
+        AGENTS[args.agent_1], AGENTS[args.agent_2], args.games, args.output, opening_moves=args.opening_moves,
+        move_time_limit=args.move_time_limit, processes=args.processes, seed=args.seed
+    )))